@@ -1,7 +1,34 @@
+import warnings
 import pandas as pd
 import numpy as np
 from rootcause_analysis import RootCauseAnalysis
 
+DELAY_TYPES = ["device_to_broker_delay", "broker_processing_delay",
+               "cloud_upload_delay", "total_delay"]
+
+# Anomaly threshold multipliers (mean + k * std) per delay type
+ANOMALY_MULTIPLIERS = {
+    "device_to_broker_delay": 2.0,   # More sensitive for local network
+    "broker_processing_delay": 2.5,
+    "cloud_upload_delay": 3.0,       # Less sensitive (more variable)
+    "total_delay": 2.0
+}
+
+DELAY_CATEGORIES = ["Low", "Normal", "High", "Very High"]
+
+BOTTLENECK_COLUMNS = ["device_to_broker_delay", "broker_processing_delay", "cloud_upload_delay"]
+BOTTLENECK_LABELS = ["Device→Broker", "Broker Processing", "Cloud Upload"]
+
+def identify_bottleneck(df):
+    """
+    Return the label of the largest delay component for every row.
+    Missing components never win unless the whole row is missing.
+    Labels are returned as a Categorical so the column stores int8 codes.
+    """
+    arr = df[BOTTLENECK_COLUMNS].to_numpy(dtype=float)
+    arr = np.where(np.isnan(arr), -np.inf, arr)
+    return pd.Categorical.from_codes(np.argmax(arr, axis=1), categories=BOTTLENECK_LABELS)
+
 def compute_packet_loss(df_packets, df_retrans):
     """
     Calculate packet loss based on TCP retransmissions.
@@ -19,68 +46,106 @@ def compute_packet_loss(df_packets, df_retrans):
     # Calculate real packet loss percentage
     return (retrans_count / total) * 100.0
 
-def detect_anomalies_in_delays(df_delays):
+def compute_delay_stats(df_delays):
+    """
+    Compute mean and standard deviation of every delay column in one pass.
+    The result can be shared by detect_anomalies_in_delays and categorize_delays.
+    Without any delay column an empty frame (mean/std rows, no columns) is returned.
+    """
+    cols = [col for col in DELAY_TYPES if col in df_delays.columns]
+    if not cols:
+        return pd.DataFrame(index=["mean", "std"])
+    return df_delays[cols].agg(["mean", "std"])
+
+def detect_anomalies_in_delays(df_delays, stats=None):
     """
     Apply different thresholds for different delay types to detect anomalies.
     """
-    delay_types = ["device_to_broker_delay", "broker_processing_delay",
-                   "cloud_upload_delay", "total_delay"]
-    thresholds = {}
-    
-    # Apply different thresholds for different delay types
-    for col in delay_types:
-        if col in df_delays.columns:
-            mean_val = df_delays[col].mean()
-            std_val = df_delays[col].std()
-            
-            # Different thresholds based on delay type
-            if col == "device_to_broker_delay":
-                threshold_multiplier = 2.0  # More sensitive for local network
-            elif col == "broker_processing_delay":
-                threshold_multiplier = 2.5
-            elif col == "cloud_upload_delay":
-                threshold_multiplier = 3.0  # Less sensitive (more variable)
-            else:  # total_delay
-                threshold_multiplier = 2.0
-            
-            cutoff = mean_val + threshold_multiplier * std_val
-            thresholds[col] = cutoff
-            df_delays[f"{col}_anomaly"] = df_delays[col] > cutoff
+    if stats is None:
+        stats = compute_delay_stats(df_delays)
+    cols = [col for col in DELAY_TYPES if col in stats.columns]
+    if not cols:
+        df_delays["is_anomaly"] = False
+        return df_delays, {}
+    
+    # Different thresholds based on delay type, compared against all columns at once
+    multipliers = np.array([ANOMALY_MULTIPLIERS[col] for col in cols])
+    cutoffs = stats.loc["mean", cols].to_numpy() + multipliers * stats.loc["std", cols].to_numpy()
+    # Compare in the columns' own dtype: the ufunc widens float32 values chunk by
+    # chunk, so no full float64 copy of the delay matrix is materialized
+    anomalies = np.greater(df_delays[cols].to_numpy(), cutoffs)
+    
+    thresholds = dict(zip(cols, cutoffs))
+    for i, col in enumerate(cols):
+        df_delays[f"{col}_anomaly"] = anomalies[:, i]
     
     # Overall anomaly if any component is anomalous
-    df_delays["is_anomaly"] = df_delays[[f"{col}_anomaly" for col in delay_types 
-                                        if f"{col}_anomaly" in df_delays.columns]].any(axis=1)
+    df_delays["is_anomaly"] = anomalies.any(axis=1)
     
     return df_delays, thresholds
 
-def categorize_delays(df_delays):
+def bucket_delays(df_delays, cols, stats):
+    """
+    Bucket delay columns into Low/Normal/High/Very High using the thresholds
+    [0, mean-0.5*std, mean+0.5*std, mean+2*std, inf] (right-inclusive, like pd.cut).
+    The bucket code is the number of inner edges a value exceeds, so all
+    columns are coded with three array comparisons instead of a pd.cut each.
+    """
+    if not cols:
+        return df_delays
+    
+    means = stats.loc["mean", cols].to_numpy(dtype=float)
+    stds = np.nan_to_num(stats.loc["std", cols].to_numpy(dtype=float))
+    # Keep edges monotonic when mean - 0.5*std falls below zero
+    low = np.maximum(means - 0.5 * stds, 0)
+    mid = np.maximum(means + 0.5 * stds, low)
+    high = np.maximum(means + 2 * stds, mid)
+    
+    values = df_delays[cols].to_numpy(dtype=float)
+    codes = (values > low).astype(np.int8)
+    codes += values > mid
+    codes += values > high
+    # Values <= 0 and NaN fall outside every bucket
+    codes[~(values > 0)] = -1
+    for i, col in enumerate(cols):
+        df_delays[f"{col}_category"] = pd.Categorical.from_codes(
+            codes[:, i], categories=DELAY_CATEGORIES, ordered=True
+        )
+    
+    return df_delays
+
+def categorize_delays(df_delays, stats=None):
     """
     Categorize delays into meaningful buckets and identify bottlenecks
     """
-    # Define category thresholds for each delay type
-    for delay_type in ["device_to_broker_delay", "broker_processing_delay", "cloud_upload_delay"]:
-        if delay_type in df_delays.columns:
-            mean = df_delays[delay_type].mean()
-            std = df_delays[delay_type].std()
-            df_delays[f"{delay_type}_category"] = pd.cut(
-                df_delays[delay_type],
-                bins=[0, mean-0.5*std, mean+0.5*std, mean+2*std, float('inf')],
-                labels=["Low", "Normal", "High", "Very High"]
-            )
+    if stats is None:
+        stats = compute_delay_stats(df_delays)
     
-    # Identify bottleneck (which component contributes most to total delay)
-    def identify_bottleneck(row):
-        components = {
-            "Device→Broker": row["device_to_broker_delay"],
-            "Broker Processing": row["broker_processing_delay"],
-            "Cloud Upload": row["cloud_upload_delay"]
-        }
-        return max(components.items(), key=lambda x: x[1])[0]
+    # Bucket every delay type against its own mean/std derived thresholds
+    bucket_delays(df_delays, [col for col in BOTTLENECK_COLUMNS if col in stats.columns], stats)
     
-    df_delays["bottleneck"] = df_delays.apply(identify_bottleneck, axis=1)
+    # Identify bottleneck (which component contributes most to total delay)
+    if all(col in df_delays.columns for col in BOTTLENECK_COLUMNS):
+        df_delays["bottleneck"] = identify_bottleneck(df_delays)
     
     return df_delays
 
+def group_connection_stats(df, aggs, fill_zero=()):
+    """
+    Aggregate per-connection statistics in one groupby pass.
+    `aggs` maps output names to (column, function) pairs; NaN values are skipped,
+    and columns listed in `fill_zero` report 0 for connections without samples.
+    """
+    grouped = df.groupby('conn_id', sort=False, observed=True)
+    if not aggs:
+        return pd.DataFrame(index=grouped.size().index)
+    
+    stats = grouped.agg(**aggs)
+    for col in fill_zero:
+        if col in stats.columns:
+            stats[col] = stats[col].fillna(0)
+    return stats
+
 def analyze_tcp_delays(df_tcp):
     """
     Analyze TCP-specific delays:
@@ -93,51 +158,43 @@ def analyze_tcp_delays(df_tcp):
     if df_tcp.empty:
         return df_tcp
     
-    # Calculate statistics for each connection
-    conn_stats = {}
+    # Calculate statistics for each connection in a single grouped pass
+    aggs = {}
+    if 'ipd' in df_tcp.columns:
+        aggs['ipd_mean'] = ('ipd', 'mean')
+        aggs['ipd_std'] = ('ipd', 'std')
+    if 'retrans_delay' in df_tcp.columns:
+        aggs['retrans_count'] = ('retrans_delay', 'count')
+        aggs['retrans_delay_mean'] = ('retrans_delay', 'mean')
+    if 'rtt' in df_tcp.columns:
+        aggs['rtt_mean'] = ('rtt', 'mean')
+        aggs['rtt_max'] = ('rtt', 'max')
+    if 'ack_delay' in df_tcp.columns:
+        aggs['ack_delay_mean'] = ('ack_delay', 'mean')
+    if 'jitter' in df_tcp.columns:
+        aggs['jitter_mean'] = ('jitter', 'mean')
+        aggs['jitter_max'] = ('jitter', 'max')
     
-    for conn_id in df_tcp['conn_id'].unique():
-        conn_data = df_tcp[df_tcp['conn_id'] == conn_id]
-        
-        stats = {}
-        # IPD statistics
-        if 'ipd' in conn_data.columns:
-            stats['ipd_mean'] = conn_data['ipd'].mean()
-            stats['ipd_std'] = conn_data['ipd'].std()
-        
-        # Retransmission statistics
-        if 'retrans_delay' in conn_data.columns:
-            retrans = conn_data[conn_data['retrans_delay'].notna()]
-            stats['retrans_count'] = len(retrans)
-            stats['retrans_delay_mean'] = retrans['retrans_delay'].mean() if not retrans.empty else 0
-        
-        # RTT statistics
-        if 'rtt' in conn_data.columns:
-            rtt_data = conn_data[conn_data['rtt'].notna()]
-            stats['rtt_mean'] = rtt_data['rtt'].mean() if not rtt_data.empty else 0
-            stats['rtt_max'] = rtt_data['rtt'].max() if not rtt_data.empty else 0
-        
-        # ACK delay statistics
-        if 'ack_delay' in conn_data.columns:
-            ack_data = conn_data[conn_data['ack_delay'].notna()]
-            stats['ack_delay_mean'] = ack_data['ack_delay'].mean() if not ack_data.empty else 0
-        
-        # Jitter statistics
-        if 'jitter' in conn_data.columns:
-            jitter_data = conn_data[conn_data['jitter'].notna()]
-            stats['jitter_mean'] = jitter_data['jitter'].mean() if not jitter_data.empty else 0
-            stats['jitter_max'] = jitter_data['jitter'].max() if not jitter_data.empty else 0
-        
-        conn_stats[conn_id] = stats
+    grouped = group_connection_stats(
+        df_tcp, aggs,
+        fill_zero=['retrans_delay_mean', 'rtt_mean', 'rtt_max', 'ack_delay_mean',
+                   'jitter_mean', 'jitter_max']
+    )
+    conn_stats = grouped.to_dict(orient='index')
     
-    # Detect anomalous delays
-    for delay_col in ['ipd', 'retrans_delay', 'rtt', 'ack_delay', 'jitter']:
-        if delay_col in df_tcp.columns:
-            mean_val = df_tcp[delay_col].mean()
-            std_val = df_tcp[delay_col].std()
-            threshold = mean_val + 2 * std_val
-            
-            df_tcp[f'{delay_col}_anomaly'] = df_tcp[delay_col] > threshold
+    # Detect anomalous delays (mean + 2*std, NaN values never flagged)
+    delay_cols = [col for col in ['ipd', 'retrans_delay', 'rtt', 'ack_delay', 'jitter']
+                  if col in df_tcp.columns]
+    if delay_cols:
+        # One contiguous matrix serves both the statistics and the comparison
+        delays = df_tcp[delay_cols].to_numpy(dtype=float)
+        with warnings.catch_warnings():
+            # All-NaN or single-sample columns yield a NaN threshold, as pandas would
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            thresholds = np.nanmean(delays, axis=0) + 2 * np.nanstd(delays, axis=0, ddof=1)
+        anomalies = delays > thresholds
+        for i, delay_col in enumerate(delay_cols):
+            df_tcp[f'{delay_col}_anomaly'] = anomalies[:, i]
     
     return df_tcp, conn_stats
 
@@ -152,44 +209,37 @@ def analyze_udp_delays(df_udp):
     if df_udp.empty:
         return df_udp
     
-    # Calculate statistics for each connection
-    conn_stats = {}
+    # Calculate statistics for each connection in a single grouped pass
+    aggs = {}
+    if 'ipd' in df_udp.columns:
+        aggs['ipd_mean'] = ('ipd', 'mean')
+        aggs['ipd_std'] = ('ipd', 'std')
+    if 'jitter' in df_udp.columns:
+        aggs['jitter_mean'] = ('jitter', 'mean')
+        aggs['jitter_max'] = ('jitter', 'max')
+    if 'possible_loss' in df_udp.columns:
+        aggs['possible_loss_sum'] = ('possible_loss', 'sum')
+        aggs['total_packets'] = ('possible_loss', 'size')
+    if 'congestion_score' in df_udp.columns:
+        aggs['congestion_score_mean'] = ('congestion_score', 'mean')
+        aggs['congestion_score_max'] = ('congestion_score', 'max')
     
-    for conn_id in df_udp['conn_id'].unique():
-        conn_data = df_udp[df_udp['conn_id'] == conn_id]
-        
-        stats = {}
-        # IPD statistics
-        if 'ipd' in conn_data.columns:
-            stats['ipd_mean'] = conn_data['ipd'].mean()
-            stats['ipd_std'] = conn_data['ipd'].std()
-        
-        # Jitter statistics
-        if 'jitter' in conn_data.columns:
-            jitter_data = conn_data[conn_data['jitter'].notna()]
-            stats['jitter_mean'] = jitter_data['jitter'].mean() if not jitter_data.empty else 0
-            stats['jitter_max'] = jitter_data['jitter'].max() if not jitter_data.empty else 0
-        
-        # Packet loss statistics
-        if 'possible_loss' in conn_data.columns:
-            stats['possible_loss_sum'] = conn_data['possible_loss'].sum()
-            stats['total_packets'] = len(conn_data)
-            stats['packet_loss_pct'] = (stats['possible_loss_sum'] / (stats['total_packets'] + stats['possible_loss_sum'])) * 100
-        
-        # Congestion statistics
-        if 'congestion_score' in conn_data.columns:
-            stats['congestion_score_mean'] = conn_data['congestion_score'].mean()
-            stats['congestion_score_max'] = conn_data['congestion_score'].max()
-        
-        conn_stats[conn_id] = stats
+    grouped = group_connection_stats(df_udp, aggs, fill_zero=['jitter_mean', 'jitter_max'])
+    if 'possible_loss_sum' in grouped.columns:
+        grouped['packet_loss_pct'] = (grouped['possible_loss_sum'] /
+                                      (grouped['total_packets'] + grouped['possible_loss_sum'])) * 100
+    conn_stats = grouped.to_dict(orient='index')
     
     # Categorize jitter levels
     if 'jitter' in df_udp.columns:
-        mean_jitter = df_udp['jitter'].mean()
-        std_jitter = df_udp['jitter'].std()
+        jitter = df_udp['jitter'].to_numpy(dtype=float)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', category=RuntimeWarning)
+            mean_jitter = np.nanmean(jitter)
+            std_jitter = np.nanstd(jitter, ddof=1)
         
         df_udp['jitter_category'] = pd.cut(
-            df_udp['jitter'],
+            jitter,
             bins=[0, mean_jitter, mean_jitter + std_jitter, float('inf')],
             labels=['Low', 'Medium', 'High']
         )
@@ -215,50 +265,15 @@ def analyze_mqtt_delays(df_mqtt):
         return df_mqtt, {}
     
     # Identify entities (Client, Broker, Cloud)
-    entity_counts = df_mqtt.groupby('entity').size().to_dict()
+    entity_counts = df_mqtt['entity'].value_counts(sort=False).to_dict()
     
     # Extract unique clients and brokers
-    detected_clients = set(df_mqtt[df_mqtt['entity'] == 'CLIENT']['src_ip'].unique())
-    detected_brokers = set(df_mqtt[df_mqtt['entity'] == 'BROKER']['src_ip'].unique())
+    entities = df_mqtt['entity'].to_numpy()
+    detected_clients = set(df_mqtt.loc[entities == 'CLIENT', 'src_ip'].unique())
+    detected_brokers = set(df_mqtt.loc[entities == 'BROKER', 'src_ip'].unique())
     
     # Calculate statistics for each message type
-    msg_type_stats = df_mqtt.groupby('msg_type_name').size().to_dict()
-    
-    # Categorize delays into meaningful buckets
-    delay_types = ['broker_processing_delay', 'device_to_broker_delay', 
-                  'cloud_upload_delay', 'total_delay']
-    
-    for delay_type in delay_types:
-        if delay_type in df_mqtt.columns:
-            mean = df_mqtt[delay_type].mean()
-            std = df_mqtt[delay_type].std()
-            
-            # Define bin edges
-            bin_edges = [0, mean - 0.5 * std, mean + 0.5 * std, mean + 2 * std, float('inf')]
-            
-            # Ensure bins are monotonically increasing
-            bin_edges = sorted(set(bin_edges))  # Remove duplicates and sort
-            
-            # Apply pd.cut() with sorted bins
-            df_mqtt[f'{delay_type}_category'] = pd.cut(
-                df_mqtt[delay_type],
-                bins=bin_edges,
-                labels=['Low', 'Normal', 'High', 'Very High']
-            )
-    
-    # Identify bottleneck (which component contributes most to total delay)
-    if all(col in df_mqtt.columns for col in ['broker_processing_delay', 
-                                             'device_to_broker_delay', 
-                                             'cloud_upload_delay']):
-        def identify_bottleneck(row):
-            components = {
-                "Device→Broker": row["device_to_broker_delay"],
-                "Broker Processing": row["broker_processing_delay"],
-                "Cloud Upload": row["cloud_upload_delay"]
-            }
-            return max(components.items(), key=lambda x: x[1])[0]
-        
-        df_mqtt["bottleneck"] = df_mqtt.apply(identify_bottleneck, axis=1)
+    msg_type_stats = df_mqtt['msg_type_name'].value_counts(sort=False).to_dict()
     
     # Collect overall statistics
     stats = {
@@ -270,13 +285,33 @@ def analyze_mqtt_delays(df_mqtt):
         'total_brokers': len(detected_brokers)
     }
     
-    # Add delay statistics
-    for delay_type in delay_types:
-        if delay_type in df_mqtt.columns:
-            stats[f'{delay_type}_mean'] = df_mqtt[delay_type].mean()
-            stats[f'{delay_type}_median'] = df_mqtt[delay_type].median()
-            stats[f'{delay_type}_max'] = df_mqtt[delay_type].max()
-            stats[f'{delay_type}_std'] = df_mqtt[delay_type].std()
+    # Captures without a complete PUBLISH/PUBACK pair carry no delay columns
+    delay_types = [col for col in DELAY_TYPES if col in df_mqtt.columns]
+    if not delay_types:
+        return df_mqtt, stats
+    
+    # Categorize delays into meaningful buckets
+    delay_stats = compute_delay_stats(df_mqtt)
+    bucket_delays(df_mqtt, delay_types, delay_stats)
+    
+    # Identify bottleneck (which component contributes most to total delay)
+    if all(col in df_mqtt.columns for col in ['broker_processing_delay', 
+                                             'device_to_broker_delay', 
+                                             'cloud_upload_delay']):
+        df_mqtt["bottleneck"] = identify_bottleneck(df_mqtt)
+    
+    # Add delay statistics (mean/std reuse delay_stats, the rest come from one array)
+    delays = df_mqtt[delay_types].to_numpy(dtype=float)
+    with warnings.catch_warnings():
+        # Columns without any measurement report NaN, as pandas would
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        medians = np.nanmedian(delays, axis=0)
+        maxima = np.nanmax(delays, axis=0)
+    for i, delay_type in enumerate(delay_types):
+        stats[f'{delay_type}_mean'] = delay_stats.loc['mean', delay_type]
+        stats[f'{delay_type}_median'] = medians[i]
+        stats[f'{delay_type}_max'] = maxima[i]
+        stats[f'{delay_type}_std'] = delay_stats.loc['std', delay_type]
     
     return df_mqtt, stats
 
@@ -296,26 +331,25 @@ def perform_root_cause_analysis(df_packets: pd.DataFrame, df_delays: pd.DataFram
     # Using columns: 'total_delay', 'protocol', 'src_ip', 'dst_ip'
     # If your DataFrame columns differ, adjust accordingly.
     if not df_packets.empty and "protocol" in df_packets.columns:
-        for idx, row in df_packets.iterrows():
-            # Dummy fallback for demonstration
-            # You can link actual delays from df_delays based on message IDs or timestamps if desired
-            delay_value = 0.0
-            if not df_delays.empty and idx < len(df_delays):
-                if "total_delay" in df_delays.columns:
-                    delay_value = df_delays.iloc[idx]["total_delay"]
-            
-            packet_size = 512  # or from row if available
-            protocol = row.get("protocol", "Unknown")
-            source_ip = row.get("src_ip", "0.0.0.0")
-            destination_ip = row.get("dst_ip", "0.0.0.0")
+        # Dummy fallback for demonstration: packet i is paired with delay row i, 0.0 past the end
+        # You can link actual delays from df_delays based on message IDs or timestamps if desired
+        n = len(df_packets)
+        delay_values = np.zeros(n)
+        if not df_delays.empty and "total_delay" in df_delays.columns:
+            paired = min(n, len(df_delays))
+            delay_values[:paired] = df_delays["total_delay"].to_numpy(dtype=float)[:paired]
+
+        def column_values(col, default):
+            return df_packets[col].tolist() if col in df_packets.columns else [default] * n
 
-            rca.add_record(
-                delay=delay_value,
-                packet_size=packet_size,
-                protocol=protocol,
-                source_ip=source_ip,
-                destination_ip=destination_ip
-            )
+        # Whole columns are handed over at once instead of one record per row
+        rca.add_records(
+            delays=delay_values.tolist(),
+            packet_sizes=[512] * n,  # or from df_packets if available
+            protocols=column_values("protocol", "Unknown"),
+            source_ips=column_values("src_ip", "0.0.0.0"),
+            destination_ips=column_values("dst_ip", "0.0.0.0")
+        )
     
     report = rca.generate_report()
     return report
\ No newline at end of file
@@ -1,10 +1,14 @@
 import streamlit as st
 import tempfile
+import hashlib
 import os
+import warnings
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 
-from pcap_parser import parse_pcap
+from pcap_parser import parse_pcap, TruncatedCaptureWarning
 from data_generator import generate_dummy_packets
+from analysis import analyze_udp_delays, analyze_mqtt_delays
 from tabs.overview import show_overview_tab
 from tabs.delay_analysis import show_delay_analysis_tab
 from tabs.insights import show_insights_tab
@@ -20,6 +24,64 @@ from tabs.rootcause_tab import show_rootcause_tab
 
 st.set_page_config(page_title="StreamSight", layout="wide")
 
+# Parsed captures are large, so only the most recent few stay in the cache
+MAX_CACHED_CAPTURES = 3
+
+@st.cache_data(show_spinner=False, max_entries=MAX_CACHED_CAPTURES)
+def load_pcap(file_digest, file_name, _file_buffer):
+    """
+    Parse an uploaded capture. Cached on the SHA-256 digest of its contents, so
+    widget interactions reuse the parsed DataFrames instead of re-running tshark.
+    Returns the parsed DataFrames and the messages of any parser warnings.
+    """
+    # tshark reads from a path, so the in-memory buffer is written out exactly once
+    suffix = os.path.splitext(file_name)[1]
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+        f.write(_file_buffer)
+        temp_path = f.name
+
+    try:
+        # Warnings are returned with the result so cache hits can show them again
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", TruncatedCaptureWarning)
+            frames = parse_pcap(temp_path)
+    finally:
+        os.remove(temp_path)
+    return frames, [str(w.message) for w in caught if issubclass(w.category, TruncatedCaptureWarning)]
+
+@st.cache_data(show_spinner=False)
+def load_dummy_packets():
+    """Generate the demo dataset once and serve it from the cache afterwards."""
+    return generate_dummy_packets()
+
+def collect_analysis(future, df):
+    """
+    Return (df, stats, error) for a submitted analysis job. A failing job reports
+    its error instead of raising, so it only affects its own tab.
+    """
+    if future is None:
+        return df, {}, None
+    try:
+        df, stats = future.result()
+    except Exception as e:
+        return df, {}, f"{type(e).__name__}: {e}"
+    return df, stats, None
+
+@st.cache_data(show_spinner=False, max_entries=MAX_CACHED_CAPTURES)
+def analyze_protocols(df_udp, df_mqtt):
+    """
+    Run the UDP and MQTT analyses once per dataset rather than on every rerun.
+    They work on disjoint DataFrames, so both run concurrently.
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        udp_future = executor.submit(analyze_udp_delays, df_udp) if not df_udp.empty else None
+        mqtt_future = executor.submit(analyze_mqtt_delays, df_mqtt) if not df_mqtt.empty else None
+
+        udp_result = collect_analysis(udp_future, df_udp)
+        mqtt_result = collect_analysis(mqtt_future, df_mqtt)
+
+    return udp_result, mqtt_result
+
 def main():
     st.title("StreamSight: IoT Network Analytics")
 
@@ -27,21 +89,29 @@ def main():
 
     if uploaded_file is not None:
         st.sidebar.write("Parsing PCAP file, please wait...")
-        temp_dir = tempfile.TemporaryDirectory()
-        temp_path = os.path.join(temp_dir.name, uploaded_file.name)
-
-        with open(temp_path, "wb") as f:
-            f.write(uploaded_file.read())
-
-        df_packets, df_delays, df_retrans, df_tcp, df_udp, df_mqtt = parse_pcap(temp_path)
-        st.sidebar.success("PCAP parsed successfully!")
+        # getbuffer() exposes the upload without copying it
+        file_buffer = uploaded_file.getbuffer()
+        file_digest = hashlib.sha256(file_buffer).hexdigest()
+        try:
+            frames, parse_warnings = load_pcap(file_digest, uploaded_file.name, file_buffer)
+        except (FileNotFoundError, RuntimeError) as e:
+            st.sidebar.error(f"Failed to parse PCAP: {e}")
+            st.stop()
+        df_packets, df_delays, df_retrans, df_tcp, df_udp, df_mqtt = frames
+        if parse_warnings:
+            for message in parse_warnings:
+                st.sidebar.warning(f"PCAP parsed partially: {message}")
+        else:
+            st.sidebar.success("PCAP parsed successfully!")
     else:
         st.sidebar.info("No PCAP uploaded. Using dummy data.")
-        df_packets, df_delays, df_retrans = generate_dummy_packets()
+        df_packets, df_delays, df_retrans = load_dummy_packets()
         df_tcp = pd.DataFrame()
         df_udp = pd.DataFrame()
         df_mqtt = pd.DataFrame()
 
+    (df_udp, udp_stats, udp_error), (df_mqtt, mqtt_stats, mqtt_error) = analyze_protocols(df_udp, df_mqtt)
+
     # Existing session state usage
     st.session_state.setdefault("filter_protocol", "")
     st.session_state.setdefault("filter_ip", "")
@@ -66,10 +136,16 @@ def main():
         show_tcp_analysis_tab(df_packets, df_retrans)
 
     with tabs[2]:
-        show_udp_analysis_tab(df_udp)
+        if udp_error:
+            st.error(f"UDP analysis failed: {udp_error}")
+        else:
+            show_udp_analysis_tab(df_udp, udp_stats)
 
     with tabs[3]:
-        show_mqtt_analysis_tab(df_mqtt)
+        if mqtt_error:
+            st.error(f"MQTT analysis failed: {mqtt_error}")
+        else:
+            show_mqtt_analysis_tab(df_mqtt, mqtt_stats)
 
     with tabs[4]:
         show_timeline_tab(df_delays, df_retrans)
@@ -7,33 +7,32 @@ def generate_dummy_delays(num_samples=30, seed=42):
     device->broker, broker processing, cloud upload, total
     Also returns a dummy protocol DataFrame if needed (skipped here).
     """
-    np.random.seed(seed)
+    rng = np.random.default_rng(seed)
     base_time = 1_600_000_000
-    device_pub_time = base_time + np.sort(np.random.randint(0, 1000, size=num_samples))
+    # Accumulating random gaps gives increasing publish times without a sort
+    device_pub_time = base_time + np.cumsum(rng.integers(0, 60, size=num_samples))
 
-    # Make sure some outliers exist for better visualization
-    dev2broker = np.random.uniform(0.02, 0.08, size=num_samples)
-    dev2broker[np.random.choice(range(num_samples), 2)] *= 2.5  # Add some outliers
-    
-    broker_ack_time = device_pub_time + dev2broker
+    # Device->broker, broker processing and cloud upload drawn in one call
+    components = rng.uniform(low=[0.02, 0.08, 0.15], high=[0.08, 0.15, 0.3], size=(num_samples, 3))
+    # Make sure some outliers exist for better visualization (two rows per component)
+    components[rng.choice(num_samples, size=(2, 3)), np.arange(3)] *= 2.5
+    dev2broker, broker_proc, cloud_up = components.T
 
-    broker_proc = np.random.uniform(0.08, 0.15, size=num_samples)
-    broker_proc[np.random.choice(range(num_samples), 2)] *= 2.5  # Add some outliers
+    broker_ack_time = device_pub_time + dev2broker
     broker_to_cloud_time = broker_ack_time + broker_proc
-
-    cloud_up = np.random.uniform(0.15, 0.3, size=num_samples)
-    cloud_up[np.random.choice(range(num_samples), 2)] *= 2.5  # Add some outliers
     cloud_ack_time = broker_to_cloud_time + cloud_up
 
     total_delay = cloud_ack_time - device_pub_time
 
+    # Delays are sub-second values, float32 keeps plenty of precision at half the width
     df_delays = pd.DataFrame({
         "msg_id": np.arange(1, num_samples+1),
         "device_publish_time": device_pub_time,
-        "device_to_broker_delay": dev2broker,
-        "broker_processing_delay": broker_proc,
-        "cloud_upload_delay": cloud_up,
-        "total_delay": total_delay
+        "device_to_broker_delay": dev2broker.astype(np.float32),
+        "broker_processing_delay": broker_proc.astype(np.float32),
+        "cloud_upload_delay": cloud_up.astype(np.float32),
+        "total_delay": total_delay.astype(np.float32),
+        "timestamp": pd.to_datetime(device_pub_time, unit='s')
     })
     # No protocol data returned here
     return df_delays, None
@@ -42,44 +41,44 @@ def generate_dummy_packets(num_packets=80, seed=999):
     """
     Generate dummy packet data for demonstration.
     """
-    np.random.seed(seed)
+    rng = np.random.default_rng(seed)
     # Simulate random timestamps, IPs, protocols
     base_time = 1_600_100_000
-    times = base_time + np.sort(np.random.randint(0, 5000, size=num_packets))
+    times = base_time + np.cumsum(rng.integers(0, 125, size=num_packets))
 
     # Simple IP sets
     ips = ["192.168.0.10", "192.168.0.20", "10.0.0.5", "203.0.113.8"]
     protos = ["MQTT", "TCP", "UDP"]
-    records = []
-    for i in range(num_packets):
-        protocol = np.random.choice(protos, p=[0.4, 0.3, 0.3])
-        src_ip = np.random.choice(ips)
-        dst_ip = np.random.choice(ips)
-        while dst_ip == src_ip:
-            dst_ip = np.random.choice(ips)
-        if protocol == "MQTT":
-            src_port = 54321
-            dst_port = 1883
-        elif protocol == "TCP":
-            src_port = np.random.randint(1024, 65535)
-            dst_port = np.random.randint(1024, 65535)
-        else:  # UDP
-            src_port = np.random.randint(1024, 65535)
-            dst_port = np.random.randint(1024, 65535)
-        records.append({
-            "timestamp": times[i],
-            "src_ip": src_ip,
-            "dst_ip": dst_ip,
-            "src_port": src_port,
-            "dst_port": dst_port,
-            "protocol": protocol
-        })
+    proto_idx = rng.choice(len(protos), size=num_packets, p=[0.4, 0.3, 0.3])
+
+    # Offset the destination index so it never equals the source
+    src_idx = rng.integers(0, len(ips), size=num_packets)
+    dst_idx = (src_idx + rng.integers(1, len(ips), size=num_packets)) % len(ips)
+
+    # MQTT uses fixed client/broker ports, TCP and UDP use random ephemeral ports
+    is_mqtt = proto_idx == 0
+    src_port = np.where(is_mqtt, 54321, rng.integers(1024, 65535, size=num_packets)).astype(np.uint16)
+    dst_port = np.where(is_mqtt, 1883, rng.integers(1024, 65535, size=num_packets)).astype(np.uint16)
+
+    records = {
+        "timestamp": times,
+        "src_ip": pd.Categorical.from_codes(src_idx, categories=ips),
+        "dst_ip": pd.Categorical.from_codes(dst_idx, categories=ips),
+        "src_port": src_port,
+        "dst_port": dst_port,
+        "protocol": pd.Categorical.from_codes(proto_idx, categories=protos)
+    }
 
-    df_packets = pd.DataFrame(records).sort_values("timestamp").reset_index(drop=True)
+    # Timestamps are increasing by construction, so the frame needs no sort
+    df_packets = pd.DataFrame(records)
 
     # Create some retrans events
-    rtimes = df_packets[df_packets["protocol"]=="TCP"].sample(frac=0.2)["timestamp"].values if len(df_packets)>0 else []
-    df_retrans = pd.DataFrame({"time": rtimes, "event": ["TCP Retransmission"]*len(rtimes)})
+    is_tcp = proto_idx == 1
+    rtimes = df_packets.loc[is_tcp, "timestamp"].sample(frac=0.2, random_state=rng).values if len(df_packets)>0 else []
+    df_retrans = pd.DataFrame({"time": rtimes,
+                               "event": pd.Categorical.from_codes(np.zeros(len(rtimes), dtype=np.int8),
+                                                                  categories=["TCP Retransmission"]),
+                               "timestamp": pd.to_datetime(rtimes, unit='s')})
 
     # Also create the dummy delays
     df_delays, _ = generate_dummy_delays(num_samples=40, seed=123)
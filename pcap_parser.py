@@ -1,20 +1,121 @@
-import pyshark
+import array
+import math
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import warnings
+from functools import lru_cache
 import pandas as pd
 import numpy as np
-import asyncio
-import nest_asyncio
-import sys
 from collections import defaultdict
 from data_generator import generate_dummy_delays  # Using your updated import
 
-# Set event loop policy and apply nest_asyncio (always apply to avoid loop issues)
-if sys.platform == "win32":
-    asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
-nest_asyncio.apply()
+# Fields requested from tshark, in output column order. Only the fields parse_pcap
+# reads are printed, so tshark never renders the full packet tree.
+TSHARK_FIELDS = [
+    'frame.time_epoch', 'frame.len', 'ip.src', 'ip.dst',
+    'tcp.srcport', 'tcp.dstport', 'udp.srcport', 'udp.dstport',
+    'tcp.stream', 'tcp.seq', 'tcp.ack', 'tcp.len',
+    'tcp.flags',
+    'tcp.analysis.retransmission', 'tcp.analysis.fast_retransmission',
+    'mqtt.msgtype', 'mqtt.msgid', 'rtp.seq'
+]
+
+# Protocol labels of the general packet table, stored as categorical codes
+PROTOCOLS = ['MQTT', 'TCP', 'UDP']
+PROTOCOL_CODES = {name: code for code, name in enumerate(PROTOCOLS)}
+
+# Read tshark's output in 1 MiB chunks rather than the default 8 KiB
+TSHARK_PIPE_BUFFER = 1 << 20
+
+# Bits of the tcp.flags bitmask, which tshark prints as hex (e.g. 0x0012 for SYN-ACK)
+TCP_FIN, TCP_SYN, TCP_RST, TCP_ACK = 0x01, 0x02, 0x04, 0x10
+
+# RFC 1918 private ranges as (mask, network) pairs on the packed IPv4 address
+PRIVATE_IPV4_RANGES = [
+    (0xFF000000, 0x0A000000),  # 10.0.0.0/8
+    (0xFFF00000, 0xAC100000),  # 172.16.0.0/12
+    (0xFFFF0000, 0xC0A80000),  # 192.168.0.0/16
+]
+
+# MQTT control packet names, indexed by the message type code
+MQTT_MSG_TYPES = (
+    "UNKNOWN", "CONNECT", "CONNACK", "PUBLISH", "PUBACK",
+    "PUBREC", "PUBREL", "PUBCOMP", "SUBSCRIBE",
+    "SUBACK", "UNSUBSCRIBE", "UNSUBACK",
+    "PINGREQ", "PINGRESP", "DISCONNECT"
+)
+
+# Per-message MQTT timestamps tracked while parsing, as slots of a 4-element list
+MQTT_TIMESTAMPS = ['client_publish_time', 'broker_ack_time', 'broker_forward_time', 'cloud_ack_time']
+CLIENT_PUBLISH, BROKER_ACK, BROKER_FORWARD, CLOUD_ACK = range(len(MQTT_TIMESTAMPS))
+NAN = float('nan')
+
+# Column dtypes enforced by ensure_dataframe_types
+# Numeric columns are stored narrow: ports fit in 16 bits, TCP/RTP counters in 32,
+# and sub-second durations keep ample precision as float32. Nullable ints keep <NA>.
+NUMERIC_DTYPES = {
+    'src_port': 'UInt16', 'dst_port': 'UInt16',
+    'seq_num': 'UInt32', 'ack_num': 'UInt32', 'payload_size': 'Int32',
+    'ipd': 'float32', 'jitter': 'float32', 'retrans_delay': 'float32',
+    'rtt': 'float32', 'ack_delay': 'float32',
+    'device_to_broker_delay': 'float32', 'broker_processing_delay': 'float32',
+    'cloud_upload_delay': 'float32', 'total_delay': 'float32'
+}
+BOOL_COLUMNS = ['is_retrans', 'flags_syn', 'flags_ack', 'flags_rst', 'flags_fin']
+CATEGORY_COLUMNS = ['protocol', 'conn_id', 'msg_type_name', 'entity', 'src_ip', 'dst_ip']
+STRING_COLUMNS = ['msg_id', 'msg_type']
+
+class TruncatedCaptureWarning(RuntimeWarning):
+    """tshark stopped with an error after some packets had already been read"""
+
+def read_tshark_fields(file_path, display_filter="mqtt or tcp or udp"):
+    """
+    Stream the TSHARK_FIELDS of every packet matching the display filter.
+    Yields one list of strings per packet; absent fields are empty strings.
+    """
+    tshark = shutil.which('tshark')
+    if tshark is None:
+        raise FileNotFoundError("tshark not found, install Wireshark to parse captures")
+
+    cmd = [tshark, '-r', file_path, '-Y', display_filter, '-T', 'fields',
+           '-E', 'separator=/t', '-E', 'occurrence=f', '-E', 'quote=n']
+    for field in TSHARK_FIELDS:
+        cmd += ['-e', field]
+
+    # stderr goes to a temporary file rather than a pipe, so a chatty tshark can
+    # never block on it while stdout is still being read
+    rows = 0
+    with tempfile.TemporaryFile(mode='w+') as stderr:
+        with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr, text=True,
+                              bufsize=TSHARK_PIPE_BUFFER) as proc:
+            # Pull a buffer's worth of complete lines per call rather than one line per packet
+            for batch in iter(lambda: proc.stdout.readlines(TSHARK_PIPE_BUFFER), []):
+                rows += len(batch)
+                for line in batch:
+                    yield line.rstrip('\n').split('\t')
+        if proc.returncode != 0:
+            stderr.seek(0)
+            message = f"tshark exited with status {proc.returncode}: {stderr.read().strip()}"
+            if rows == 0:
+                # Corrupt or unsupported captures must not pass as empty ones
+                raise RuntimeError(message)
+            # Truncated captures (e.g. a killed live capture) keep every complete packet
+            warnings.warn(f"{message} (showing the {rows} packets read before the error)",
+                          TruncatedCaptureWarning)
+
+def to_int(value, default=None):
+    """Convert a tshark field to int, returning default when absent or malformed"""
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return default
 
 def parse_pcap(file_path):
     """
-    Parse a .pcap or .pcapng file using PyShark and extract:
+    Parse a .pcap or .pcapng file with tshark field extraction and extract:
       - df_packets: General packet information (src/dst IP, protocol, timestamps, ports, etc.)
       - df_delays: MQTT delay components (Broker Processing, Broker-Client, Cloud Upload, Total)
       - df_retrans: TCP retransmission events
@@ -24,53 +125,58 @@ def parse_pcap(file_path):
     
     The parser incorporates both standard MQTT messages and also treats TCP traffic on port 8883 as MQTT traffic.
     """
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    
-    # Open the pcap file with a display filter for efficiency
-    cap = pyshark.FileCapture(file_path, display_filter="mqtt or tcp or udp", 
-                              eventloop=loop)
-    
     # Initialize data structures for overall packet data and protocol-specific tracking
-    packet_records = []
-    retrans_times = []
+    # General packet table, one list per column
+    pkt_times, pkt_src_ips, pkt_dst_ips = [], [], []
+    ip_codes = {}  # Address -> categorical code shared by src_ip and dst_ip
+    flow_ids = {}  # (src_ip, src_port, dst_ip, dst_port) -> conn_id string
+    pkt_src_ports, pkt_dst_ports, pkt_protocols = [], [], []
+    retrans_times = array.array('d')  # Packed float64 timestamps
     tcp_connections = defaultdict(list)
     udp_connections = defaultdict(list)
-    mqtt_messages = {}       # For tracking delay components by message ID
+    mqtt_messages = {}       # Message ID -> timestamp slots (see MQTT_TIMESTAMPS), NaN until seen
     mqtt_connections = defaultdict(list)  # For MQTT-specific packet details
     clients = set()
     brokers = set()
     
-    # Process each packet in the capture
-    for packet_id, packet in enumerate(cap):
+    # Process each packet in the capture, filtered by tshark itself
+    for packet_id, fields in enumerate(read_tshark_fields(file_path)):
         try:
+            (time_epoch, frame_len, ip_src, ip_dst, tcp_srcport, tcp_dstport,
+             udp_srcport, udp_dstport, tcp_stream, tcp_seq, tcp_ack, tcp_len,
+             tcp_flags, tcp_retrans, tcp_fast_retrans,
+             mqtt_msgtype, mqtt_msgid, rtp_seq) = fields
+            has_tcp = tcp_srcport != ''
+            has_udp = udp_srcport != ''
+            
             # Extract common packet information
-            timestamp = float(packet.frame_info.time_epoch)
-            protocol = packet.transport_layer if hasattr(packet, 'transport_layer') else 'OTHER'
+            timestamp = float(time_epoch)
+            protocol = 'TCP' if has_tcp else 'UDP' if has_udp else None
             
             # Get IP addresses if available
-            if hasattr(packet, 'ip'):
-                src_ip = str(packet.ip.src)
-                dst_ip = str(packet.ip.dst)
+            if ip_src:
+                # Interned so every record of a host shares one string object
+                src_ip = sys.intern(ip_src)
+                dst_ip = sys.intern(ip_dst)
             else:
                 src_ip, dst_ip = None, None
-
-            # Get TCP/UDP ports with proper type conversion
+            
+            # Get TCP/UDP ports
             src_port, dst_port = None, None
-            if hasattr(packet, 'tcp'):
-                try:
-                    # Explicitly convert to string first, then to int
-                    src_port = int(str(packet.tcp.srcport)) if hasattr(packet.tcp, 'srcport') else None
-                    dst_port = int(str(packet.tcp.dstport)) if hasattr(packet.tcp, 'dstport') else None
-                except (ValueError, TypeError):
-                    src_port, dst_port = None, None
-            elif hasattr(packet, 'udp'):
-                try:
-                    # Explicitly convert to string first, then to int
-                    src_port = int(str(packet.udp.srcport)) if hasattr(packet.udp, 'srcport') else None
-                    dst_port = int(str(packet.udp.dstport)) if hasattr(packet.udp, 'dstport') else None
-                except (ValueError, TypeError):
-                    src_port, dst_port = None, None
+            if has_tcp:
+                src_port = to_int(tcp_srcport)
+                dst_port = to_int(tcp_dstport)
+            elif has_udp:
+                src_port = to_int(udp_srcport)
+                dst_port = to_int(udp_dstport)
+            
+            # Connection ID of a complete 4-tuple, formatted once per flow and then shared
+            flow_id = None
+            if src_ip and dst_ip and src_port and dst_port:
+                flow_key = (src_ip, src_port, dst_ip, dst_port)
+                flow_id = flow_ids.get(flow_key)
+                if flow_id is None:
+                    flow_id = flow_ids[flow_key] = f"{src_ip}:{src_port}-{dst_ip}:{dst_port}"
             
             # Base packet info record
             packet_info = {
@@ -82,20 +188,14 @@ def parse_pcap(file_path):
             }
             
             # Process MQTT packets if present
-            if hasattr(packet, 'mqtt'):
+            if mqtt_msgtype:
                 protocol = "MQTT"
                 try:
-                    # Safely convert message ID
-                    try:
-                        msg_id = str(getattr(packet.mqtt, 'msgid', None))
-                    except:
-                        msg_id = f"mqtt_{packet_id}"
-                    
-                    # Safely convert message type
-                    try:
-                        msg_type = str(getattr(packet.mqtt, 'msgtype', None))
-                    except:
-                        msg_type = None
+                    # Messages without an ID (CONNECT, PINGREQ, ...) share the 'None' key
+                    msg_id = mqtt_msgid or 'None'
+                    msg_type = sys.intern(mqtt_msgtype)
+                    # Timestamp slots of this message; only PUBLISH and PUBACK fill them
+                    slots = mqtt_messages.setdefault(msg_id, [NAN] * 4)
                     
                     # Map message type using helper
                     msg_type_name = get_mqtt_msg_type(msg_type)
@@ -108,7 +208,7 @@ def parse_pcap(file_path):
                         'msg_id': msg_id,
                         'msg_type': msg_type,
                         'msg_type_name': msg_type_name,
-                        'conn_id': f"{src_ip}:{src_port}-{dst_ip}:{dst_port}" if src_ip and dst_ip and src_port and dst_port else f"mqtt_{packet_id}"
+                        'conn_id': flow_id or f"mqtt_{packet_id}"
                     }
                     
                     # Updated MQTT handling logic:
@@ -117,29 +217,25 @@ def parse_pcap(file_path):
                             clients.add(src_ip)
                         if dst_ip:
                             brokers.add(dst_ip)
-                        mqtt_messages.setdefault(msg_id, {})['connect_time'] = timestamp
                         mqtt_info['entity'] = 'CLIENT'
                     elif msg_type == '2':  # CONNACK
                         if src_ip:
                             brokers.add(src_ip)
-                        mqtt_messages.setdefault(msg_id, {})['connack_time'] = timestamp
                         mqtt_info['entity'] = 'BROKER'
                     elif msg_type == '3':  # PUBLISH
-                        mqtt_messages.setdefault(msg_id, {})
                         # Use port heuristics to decide role
                         if dst_port == 1883:
-                            mqtt_messages[msg_id]['client_publish_time'] = timestamp
+                            slots[CLIENT_PUBLISH] = timestamp
                             mqtt_info['entity'] = 'CLIENT'
                         elif src_port == 1883:
-                            mqtt_messages[msg_id]['broker_forward_time'] = timestamp
+                            slots[BROKER_FORWARD] = timestamp
                             mqtt_info['entity'] = 'BROKER'
                     elif msg_type == '4':  # PUBACK
-                        mqtt_messages.setdefault(msg_id, {})
                         if src_port == 1883:
-                            mqtt_messages[msg_id]['broker_ack_time'] = timestamp
+                            slots[BROKER_ACK] = timestamp
                             mqtt_info['entity'] = 'BROKER'
                         else:
-                            mqtt_messages[msg_id]['cloud_ack_time'] = timestamp
+                            slots[CLOUD_ACK] = timestamp
                             mqtt_info['entity'] = 'CLOUD'
                     else:
                         mqtt_info['entity'] = 'UNKNOWN'
@@ -148,17 +244,14 @@ def parse_pcap(file_path):
                 except Exception as e:
                     print(f"Error processing MQTT packet: {e}")
             
-            # For TCP packets on port 8883 that are not marked as MQTT by PyShark
-            elif hasattr(packet, 'tcp') and (src_port == 8883 or dst_port == 8883):
+            # For TCP packets on port 8883 that are not decoded as MQTT by tshark
+            elif has_tcp and (src_port == 8883 or dst_port == 8883):
                 protocol = "MQTT"
                 
                 # Get TCP stream ID as message identifier
-                try:
-                    msg_id = str(packet.tcp.stream)
-                except AttributeError:
-                    msg_id = f'8883_{timestamp}'  # Fallback ID
+                msg_id = tcp_stream or f'8883_{timestamp}'  # Fallback ID
                 
-                mqtt_messages.setdefault(msg_id, {})
+                slots = mqtt_messages.setdefault(msg_id, [NAN] * 4)
                 
                 # Identify broker/client based on port direction
                 if src_port == 8883:
@@ -174,15 +267,15 @@ def parse_pcap(file_path):
                 
                 # Calculate message timing metrics
                 if dst_port == 8883:  # Client -> Broker
-                    if 'client_publish_time' not in mqtt_messages[msg_id]:
-                        mqtt_messages[msg_id]['client_publish_time'] = timestamp
+                    if math.isnan(slots[CLIENT_PUBLISH]):
+                        slots[CLIENT_PUBLISH] = timestamp
                     else:
-                        mqtt_messages[msg_id]['broker_forward_time'] = timestamp
+                        slots[BROKER_FORWARD] = timestamp
                 else:  # Broker -> Client
-                    if 'broker_ack_time' not in mqtt_messages[msg_id]:
-                        mqtt_messages[msg_id]['broker_ack_time'] = timestamp
+                    if math.isnan(slots[BROKER_ACK]):
+                        slots[BROKER_ACK] = timestamp
                     else:
-                        mqtt_messages[msg_id]['cloud_ack_time'] = timestamp
+                        slots[CLOUD_ACK] = timestamp
                 
                 # Determine entity role
                 entity = 'BROKER' if src_ip == broker_ip else 'CLIENT'
@@ -193,9 +286,9 @@ def parse_pcap(file_path):
                     'src_port': src_port,
                     'dst_port': dst_port,
                     'msg_id': msg_id,
-                    'msg_type': None, 
+                    'msg_type': None,
                     'msg_type_name': "UNKNOWN",#, Could parse actual MQTT control packet type here
-                    'conn_id': f"{src_ip}:{src_port}-{dst_ip}:{dst_port}",
+                    'conn_id': flow_id or f"{src_ip}:{src_port}-{dst_ip}:{dst_port}",
                     'entity': entity,
                     'is_retrans': False
                 }
@@ -203,45 +296,34 @@ def parse_pcap(file_path):
                 mqtt_connections[mqtt_info['conn_id']].append(mqtt_info)
                 
                 # Detect retransmissions
-                if hasattr(packet.tcp, 'analysis_retransmission'):
+                if tcp_retrans:
                     mqtt_info['is_retrans'] = True
                     retrans_times.append(timestamp)
-                
-                
+            
+            
             # Process plain TCP packets (excluding the 8883 MQTT branch)
-            elif hasattr(packet, 'tcp'):
+            elif has_tcp:
                 protocol = "TCP"
-                conn_id = f"{src_ip}:{src_port}-{dst_ip}:{dst_port}" if src_ip and dst_ip and src_port and dst_port else f"tcp_{packet_id}"
+                conn_id = flow_id or f"tcp_{packet_id}"
                 
-                # Safely convert sequence and acknowledgment numbers
-                try:
-                    seq_num = int(str(packet.tcp.seq)) if hasattr(packet.tcp, 'seq') else 0
-                except (ValueError, TypeError):
-                    seq_num = 0
-                    
-                try:
-                    ack_num = int(str(packet.tcp.ack)) if hasattr(packet.tcp, 'ack') else 0
-                except (ValueError, TypeError):
-                    ack_num = 0
+                # Sequence and acknowledgment numbers default to 0 when missing
+                seq_num = to_int(tcp_seq, 0)
+                ack_num = to_int(tcp_ack, 0)
                 
-                # Safely extract TCP flags
-                flags_syn = 1 if hasattr(packet.tcp, 'flags_syn') and str(packet.tcp.flags_syn) == '1' else 0
-                flags_ack = 1 if hasattr(packet.tcp, 'flags_ack') and str(packet.tcp.flags_ack) == '1' else 0
-                flags_rst = 1 if hasattr(packet.tcp, 'flags_reset') and str(packet.tcp.flags_reset) == '1' else 0
-                flags_fin = 1 if hasattr(packet.tcp, 'flags_fin') and str(packet.tcp.flags_fin) == '1' else 0
+                # Extract TCP flags from the single bitmask field
+                flags = int(tcp_flags, 16) if tcp_flags else 0
+                flags_syn = 1 if flags & TCP_SYN else 0
+                flags_ack = 1 if flags & TCP_ACK else 0
+                flags_rst = 1 if flags & TCP_RST else 0
+                flags_fin = 1 if flags & TCP_FIN else 0
                 
-                # Safely calculate payload size
-                try:
-                    hdr_len = int(str(packet.tcp.hdr_len)) if hasattr(packet.tcp, 'hdr_len') else 0
-                    payload_size = len(packet) - hdr_len if hdr_len > 0 else 0
-                except (ValueError, TypeError):
-                    payload_size = 0
+                # TCP segment payload length as computed by tshark (0 for bare ACKs)
+                payload_size = to_int(tcp_len, 0)
                 
-                is_retrans = False
-                if hasattr(packet.tcp, 'analysis_retransmission') or hasattr(packet.tcp, 'analysis_fast_retransmission'):
-                    # print("Retransmission detected")
+                # Either expert flag marks a retransmission; checked once per packet
+                is_retrans = bool(tcp_retrans or tcp_fast_retrans)
+                if is_retrans:
                     retrans_times.append(timestamp)
-                    is_retrans = True
                 
                 tcp_info = {
                     **packet_info,
@@ -258,28 +340,14 @@ def parse_pcap(file_path):
                     'conn_id': conn_id
                 }
                 tcp_connections[conn_id].append(tcp_info)
-                
-                # print("TCP packet fields:", dir(packet.tcp)) 
-
-                is_retrans = False
-                if hasattr(packet.tcp, 'analysis_retransmission') or hasattr(packet.tcp, 'analysis_fast_retransmission'):
-                    print("Retransmission detected")
-                    retrans_times.append(timestamp)
-                    is_retrans = True
-
-                tcp_info['is_retrans'] = is_retrans
-                
+            
             # Process UDP packets
-            elif hasattr(packet, 'udp'):
+            elif has_udp:
                 protocol = "UDP"
-                conn_id = f"{src_ip}:{src_port}-{dst_ip}:{dst_port}" if src_ip and dst_ip and src_port and dst_port else f"udp_{packet_id}"
+                conn_id = flow_id or f"udp_{packet_id}"
+                
+                payload_size = to_int(frame_len, 0)
                 
-                # Safely calculate payload size
-                try:
-                    payload_size = len(packet) if hasattr(packet, 'udp') else 0
-                except:
-                    payload_size = 0
-                    
                 udp_info = {
                     **packet_info,
                     'src_port': src_port,
@@ -288,37 +356,51 @@ def parse_pcap(file_path):
                     'conn_id': conn_id
                 }
                 
-                if hasattr(packet, 'rtp'):
-                    try:
-                        udp_info['seq_num'] = int(str(packet.rtp.seq)) if hasattr(packet.rtp, 'seq') else None
-                    except (ValueError, TypeError):
-                        udp_info['seq_num'] = None
-                        
+                if rtp_seq:
+                    udp_info['seq_num'] = to_int(rtp_seq)
+                
                 udp_connections[conn_id].append(udp_info)
             
             # For any other protocol, no additional processing is done
             
-            # Record the general packet info
-            packet_records.append({
-                "timestamp": timestamp,
-                "src_ip": src_ip,
-                "dst_ip": dst_ip,
-                "src_port": src_port,
-                "dst_port": dst_port,
-                "protocol": protocol
-            })
+            # Record the general packet info column by column
+            pkt_times.append(timestamp)
+            pkt_src_ips.append(ip_codes.setdefault(src_ip, len(ip_codes)) if src_ip else -1)
+            pkt_dst_ips.append(ip_codes.setdefault(dst_ip, len(ip_codes)) if dst_ip else -1)
+            pkt_src_ports.append(src_port)
+            pkt_dst_ports.append(dst_port)
+            pkt_protocols.append(PROTOCOL_CODES.get(protocol, -1))
         except Exception as e:
             print(f"Error processing packet {packet_id}: {e}")
     
-    cap.close()
-    loop.close()
-    
     # Build DataFrames for general packets and retransmissions
-    df_packets = pd.DataFrame(packet_records).sort_values("timestamp").reset_index(drop=True)
-    df_retrans = pd.DataFrame({"time": retrans_times, "event": ["TCP Retransmission"] * len(retrans_times)})
+    # Columns are built straight into their final dtypes, no per-row records to transpose
+    ts_arr = np.array(pkt_times, dtype=np.float64)
+    ip_list = list(ip_codes)
+    packet_columns = {
+        "timestamp": ts_arr,
+        "src_ip": pd.Categorical.from_codes(np.array(pkt_src_ips, dtype=np.int32), categories=ip_list),
+        "dst_ip": pd.Categorical.from_codes(np.array(pkt_dst_ips, dtype=np.int32), categories=ip_list),
+        "src_port": pd.array(pkt_src_ports, dtype='UInt16'),
+        "dst_port": pd.array(pkt_dst_ports, dtype='UInt16'),
+        "protocol": pd.Categorical.from_codes(np.array(pkt_protocols, dtype=np.int8), categories=PROTOCOLS)
+    }
+    # Captures are almost always written in time order, so only reorder when needed;
+    # each column is gathered by the timestamp order before the frame exists
+    if (np.diff(ts_arr) < 0).any():
+        order = np.argsort(ts_arr, kind="stable")
+        packet_columns = {name: col.take(order) for name, col in packet_columns.items()}
+    df_packets = pd.DataFrame(packet_columns)
+    # Every row carries the same event label, stored once as a single category
+    df_retrans = pd.DataFrame({
+        "time": np.frombuffer(retrans_times, dtype=np.float64),
+        "event": pd.Categorical.from_codes(np.zeros(len(retrans_times), dtype=np.int8),
+                                           categories=["TCP Retransmission"])
+    })
     
     print("Detected Clients:", clients)
     print("Detected Brokers:", brokers)
+    print("Detected Retransmissions:", len(retrans_times))
     
     # Calculate MQTT delays from tracked message timestamps
     df_delays = extract_mqtt_delays(mqtt_messages)
@@ -331,7 +413,7 @@ def parse_pcap(file_path):
     # Calculate protocol-specific metrics
     df_tcp = calculate_tcp_metrics(tcp_connections)
     df_udp = calculate_udp_metrics(udp_connections)
-    df_mqtt = calculate_mqtt_metrics(mqtt_connections, mqtt_messages)
+    df_mqtt = calculate_mqtt_metrics(mqtt_connections, df_delays)
     
     # Ensure all numeric columns are properly typed for PyArrow compatibility
     df_packets = ensure_dataframe_types(df_packets)
@@ -340,135 +422,162 @@ def parse_pcap(file_path):
     df_mqtt = ensure_dataframe_types(df_mqtt)
     df_delays = ensure_dataframe_types(df_delays)
     
+    # Datetime axes for the Timeline tab, converted once here instead of per render
+    if not df_delays.empty:
+        df_delays['timestamp'] = pd.to_datetime(df_delays['device_publish_time'], unit='s')
+    df_retrans['timestamp'] = pd.to_datetime(df_retrans['time'], unit='s')
+    
     return df_packets, df_delays, df_retrans, df_tcp, df_udp, df_mqtt
 
 def ensure_dataframe_types(df):
     """Ensure DataFrame column types are compatible with PyArrow"""
     if df.empty:
         return df
-        
-    # Define columns that should be numeric
-    numeric_cols = ['src_port', 'dst_port', 'seq_num', 'ack_num', 'payload_size', 
-                   'ipd', 'jitter', 'retrans_delay', 'rtt', 'ack_delay',
-                   'device_to_broker_delay', 'broker_processing_delay', 
-                   'cloud_upload_delay', 'total_delay']
-    
-    # Convert columns to appropriate types
-    for col in df.columns:
-        if col in numeric_cols and col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-        # Handle boolean columns
-        elif col in ['is_retrans', 'flags_syn', 'flags_ack', 'flags_rst', 'flags_fin'] and col in df.columns:
-            df[col] = df[col].astype(bool)
-            
-        # Ensure string columns are actually strings
-        elif col in ['src_ip', 'dst_ip', 'protocol', 'conn_id', 'msg_id', 'msg_type', 
-                    'msg_type_name', 'entity'] and col in df.columns:
-            df[col] = df[col].astype(str)
     
-    return df
+    # Only columns that are not numeric yet need parsing, all in one call
+    to_parse = [col for col in NUMERIC_DTYPES
+                if col in df.columns and not pd.api.types.is_numeric_dtype(df[col])]
+    if to_parse:
+        df[to_parse] = df[to_parse].apply(pd.to_numeric, errors='coerce')
+    
+    # Labels and IDs go through str first so missing values read as 'None'
+    labels = [col for col in CATEGORY_COLUMNS
+              if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype)]
+    strings = [col for col in STRING_COLUMNS if col in df.columns]
+    if labels or strings:
+        df[labels + strings] = df[labels + strings].astype(str)
+    
+    # Every remaining conversion is applied in a single astype
+    dtypes = {col: dtype for col, dtype in NUMERIC_DTYPES.items() if col in df.columns}
+    dtypes.update({col: bool for col in BOOL_COLUMNS if col in df.columns})
+    dtypes.update({col: 'category' for col in labels})
+    return df.astype(dtypes)
 
 def get_mqtt_msg_type(type_code):
     """Map MQTT message type codes to names"""
-    if type_code is None:
-        return "UNKNOWN"
-        
-    mqtt_types = {
-        '1': "CONNECT", '2': "CONNACK", '3': "PUBLISH", '4': "PUBACK",
-        '5': "PUBREC", '6': "PUBREL", '7': "PUBCOMP", '8': "SUBSCRIBE",
-        '9': "SUBACK", '10': "UNSUBSCRIBE", '11': "UNSUBACK",
-        '12': "PINGREQ", '13': "PINGRESP", '14': "DISCONNECT"
-    }
-    return mqtt_types.get(str(type_code), "UNKNOWN")
+    code = to_int(type_code, 0)
+    return MQTT_MSG_TYPES[code] if 0 < code < len(MQTT_MSG_TYPES) else "UNKNOWN"
 
+@lru_cache(maxsize=65536)
 def is_external_ip(ip):
     """Determine if an IP is likely external/cloud service"""
-    if ip is None:
+    # Captures hold few distinct addresses, so repeated calls are cache hits
+    if not isinstance(ip, str) or ip.count('.') != 3:
         return False
         
     try:
-        octets = ip.split('.')
-        if len(octets) != 4:
-            return False
-        if octets[0] == '10':
-            return False
-        if octets[0] == '172' and 16 <= int(octets[1]) <= 31:
-            return False
-        if octets[0] == '192' and octets[1] == '168':
-            return False
-        return True
-    except Exception:
+        addr = int.from_bytes(socket.inet_aton(ip), 'big')
+    except OSError:
         return False
+    return not any((addr & mask) == network for mask, network in PRIVATE_IPV4_RANGES)
 
 def extract_mqtt_delays(mqtt_messages):
     """Calculate MQTT delay components from tracked message timestamps"""
-    delay_records = []
-    for msg_id, timestamps in mqtt_messages.items():
-        # Ensure we have the minimum timestamps for delay calculation
-        if 'client_publish_time' in timestamps and 'broker_ack_time' in timestamps:
-            client_publish_time = timestamps['client_publish_time']
-            broker_ack_time = timestamps['broker_ack_time']
-            broker_forward_time = timestamps.get('broker_forward_time')
-            cloud_ack_time = timestamps.get('cloud_ack_time')
-            
-            broker_client_delay = broker_ack_time - client_publish_time
-            broker_processing_delay = (broker_forward_time - broker_ack_time) if broker_forward_time else 0
-            cloud_upload_delay = (cloud_ack_time - broker_forward_time) if (cloud_ack_time and broker_forward_time) else 0
-            
-            total_delay = (cloud_ack_time - client_publish_time) if cloud_ack_time else (
-                broker_client_delay + broker_processing_delay
-            )
-            
-            delay_records.append({
-                "msg_id": str(msg_id),
-                "device_publish_time": client_publish_time,
-                "device_to_broker_delay": broker_ack_time - client_publish_time,
-                "broker_processing_delay": (broker_forward_time - broker_ack_time) if broker_forward_time else 0,
-                "cloud_upload_delay": (cloud_ack_time - broker_forward_time) if (cloud_ack_time and broker_forward_time) else 0,
-                "total_delay": total_delay
-            })
+    if not mqtt_messages:
+        return pd.DataFrame()
+    
+    # One row per message ID and one column per timestamp slot, NaN where unseen
+    timestamps = np.array(list(mqtt_messages.values()), dtype=float)
+    msg_ids = pd.Index(list(mqtt_messages.keys())).astype(str)
+    # Ensure we have the minimum timestamps for delay calculation
+    complete = ~np.isnan(timestamps[:, CLIENT_PUBLISH]) & ~np.isnan(timestamps[:, BROKER_ACK])
+    if not complete.any():
+        return pd.DataFrame()
+    
+    timestamps = timestamps[complete]
+    msg_ids = msg_ids[complete]
+    client_publish_time, broker_ack_time, broker_forward_time, cloud_ack_time = timestamps.T
+    device_to_broker_delay = broker_ack_time - client_publish_time
+    # Components whose timestamps were never seen count as 0
+    broker_processing_delay = np.nan_to_num(broker_forward_time - broker_ack_time)
+    cloud_upload_delay = np.nan_to_num(cloud_ack_time - broker_forward_time)
+    total_delay = np.where(np.isnan(cloud_ack_time),
+                           device_to_broker_delay + broker_processing_delay,
+                           cloud_ack_time - client_publish_time)
+    
+    return pd.DataFrame({
+        "msg_id": msg_ids,
+        "device_publish_time": client_publish_time,
+        "device_to_broker_delay": device_to_broker_delay,
+        "broker_processing_delay": broker_processing_delay,
+        "cloud_upload_delay": cloud_upload_delay,
+        "total_delay": total_delay
+    })
 
-    return pd.DataFrame(delay_records) if delay_records else pd.DataFrame()
+def stack_connections(connections):
+    """
+    Concatenate per-connection packet lists into one DataFrame, connections back
+    to back and each in time order. Returns the frame and every row's connection index.
+    """
+    rows = []
+    sizes = []
+    for packets in connections.values():
+        rows.extend(packets)
+        sizes.append(len(packets))
+    
+    df = pd.DataFrame(rows)
+    conn_idx = np.repeat(np.arange(len(sizes)), sizes)
+    # Packets are appended in capture order, so connections are normally sorted already
+    ts = df['timestamp'].to_numpy(dtype=float)
+    if ((np.diff(ts) < 0) & (conn_idx[1:] == conn_idx[:-1])).any():
+        order = np.lexsort((ts, conn_idx))
+        df = df.take(order).reset_index(drop=True)
+    return df, conn_idx
 
 def calculate_tcp_metrics(tcp_connections):
     """Calculate TCP-specific metrics such as IPD, RTT, jitter and retransmission details"""
     if not tcp_connections:
         return pd.DataFrame()
     
-    tcp_data = []
-    for conn_id, packets in tcp_connections.items():
-        packets.sort(key=lambda x: x['timestamp'])
-        for i in range(1, len(packets)):
-            packets[i]['ipd'] = packets[i]['timestamp'] - packets[i-1]['timestamp']
-        seq_nums = {}
-        for i, pkt in enumerate(packets):
-            seq = pkt['seq_num']
-            if seq in seq_nums and seq > 0:
-                packets[i]['retrans_delay'] = pkt['timestamp'] - packets[seq_nums[seq]]['timestamp']
-            seq_nums.setdefault(seq, i)
-        for i, pkt in enumerate(packets):
-            if pkt['flags_syn'] == 1 and pkt['flags_ack'] == 0:
-                for j in range(i+1, len(packets)):
-                    if packets[j]['flags_syn'] == 1 and packets[j]['flags_ack'] == 1:
-                        packets[i]['rtt'] = packets[j]['timestamp'] - pkt['timestamp']
-                        break
-        for i in range(len(packets)-1):
-            if (packets[i]['payload_size'] > 0 and 
-                packets[i+1]['flags_ack'] == 1 and
-                packets[i+1]['ack_num'] == packets[i]['seq_num'] + packets[i]['payload_size']):
-                packets[i]['ack_delay'] = packets[i+1]['timestamp'] - packets[i]['timestamp']
-        for i in range(2, len(packets)):
-            if 'ipd' in packets[i] and 'ipd' in packets[i-1]:
-                packets[i]['jitter'] = abs(packets[i]['ipd'] - packets[i-1]['ipd'])
-        tcp_data.extend(packets)
-    
-    df_tcp = pd.DataFrame(tcp_data)
+    df_tcp, conn_idx = stack_connections(tcp_connections)
+    
+    # Neighbouring-packet metrics are whole-column operations, masked wherever
+    # two rows belong to different connections
+    n = len(df_tcp)
+    same_conn = conn_idx[1:] == conn_idx[:-1]
+    ts = df_tcp['timestamp'].to_numpy(dtype=float)
+    syn = df_tcp['flags_syn'].to_numpy() == 1
+    ack = df_tcp['flags_ack'].to_numpy() == 1
+    seq = df_tcp['seq_num'].to_numpy()
+    ack_num = df_tcp['ack_num'].to_numpy()
+    payload = df_tcp['payload_size'].to_numpy()
+    
+    # Inter-packet delay since the previous packet of the connection
+    ipd = np.full(n, np.nan)
+    ipd[1:] = np.where(same_conn, np.diff(ts), np.nan)
+    
+    # Handshake RTT from a SYN to the next SYN-ACK on its connection
+    synack_pos = np.where(syn & ack, np.arange(n), n)
+    next_synack = np.minimum.accumulate(synack_pos[::-1])[::-1]
+    paired = syn & ~ack & (next_synack < n)
+    next_synack = np.minimum(next_synack, n - 1)
+    paired &= conn_idx[next_synack] == conn_idx
+    rtt = np.where(paired, ts[next_synack] - ts, np.nan)
+    
+    # Ack delay when the next packet acknowledges exactly this packet's payload
+    ack_delay = np.full(n, np.nan)
+    acked = same_conn & (payload[:-1] > 0) & ack[1:] & (ack_num[1:] == seq[:-1] + payload[:-1])
+    ack_delay[:-1] = np.where(acked, np.diff(ts), np.nan)
+    
+    # Jitter is the change between consecutive IPDs (NaN spans connection starts)
+    jitter = np.full(n, np.nan)
+    jitter[1:] = np.abs(np.diff(ipd))
+    
+    # Metrics that never apply are left out, the tabs check for the column
+    for col, values in (('ipd', ipd), ('rtt', rtt), ('ack_delay', ack_delay), ('jitter', jitter)):
+        if not np.isnan(values).all():
+            df_tcp[col] = values
+    
+    # A sequence number seen again on the same connection is a resend; its delay is the
+    # time since the first packet carrying it (seq 0 belongs to the handshake)
+    resent = df_tcp.duplicated(['conn_id', 'seq_num']).to_numpy() & (df_tcp['seq_num'].to_numpy() > 0)
+    if resent.any():
+        first_seen = df_tcp.groupby(['conn_id', 'seq_num'], sort=False)['timestamp'].transform('first')
+        df_tcp['retrans_delay'] = np.where(resent, df_tcp['timestamp'] - first_seen, np.nan)
+    
     if not df_tcp.empty and 'is_retrans' in df_tcp.columns:
-        total_packets = len(df_tcp)
-        retrans_count = df_tcp['is_retrans'].sum()
-        packet_loss_pct = (retrans_count / total_packets) * 100 if total_packets > 0 else 0
-        df_tcp['packet_loss_pct'] = packet_loss_pct
+        # Retransmissions are flagged per packet, so the loss share is just the flag mean
+        df_tcp['packet_loss_pct'] = 100.0 * df_tcp['is_retrans'].to_numpy(dtype=float).mean()
     return df_tcp
 
 def calculate_udp_metrics(udp_connections):
@@ -476,78 +585,67 @@ def calculate_udp_metrics(udp_connections):
     if not udp_connections:
         return pd.DataFrame()
     
-    udp_data = []
-    for conn_id, packets in udp_connections.items():
-        packets.sort(key=lambda x: x['timestamp'])
-        for i in range(1, len(packets)):
-            packets[i]['ipd'] = packets[i]['timestamp'] - packets[i-1]['timestamp']
-        ipds = [pkt.get('ipd', 0) for pkt in packets if 'ipd' in pkt]
-        mean_ipd = np.mean(ipds) if ipds else 0
-        std_ipd = np.std(ipds) if ipds else 0
-        for i in range(2, len(packets)):
-            if 'ipd' in packets[i] and 'ipd' in packets[i-1]:
-                # Calculate the delta (difference in IPDs)
-                delta = abs(packets[i]['ipd'] - packets[i-1]['ipd'])
-                
-                # Initialize jitter for the first calculated packet
-                if i == 2:
-                    packets[i]['jitter'] = delta
-                else:
-                    # Apply RFC 3550 exponential moving average with 1/16 smoothing factor
-                    # J = J + (|D(i-1,i)|-J)/16
-                    prev_jitter = packets[i-1].get('jitter', 0)
-                    packets[i]['jitter'] = prev_jitter + (delta - prev_jitter) / 16
-                
-                # Keep the original packet loss detection logic
-                ipd_threshold = mean_ipd + 3 * std_ipd
-                if packets[i]['ipd'] > ipd_threshold:
-                    packets[i]['possible_loss'] = np.ceil(packets[i]['ipd'] / mean_ipd) - 1 if mean_ipd > 0 else 0
-                else:
-                    packets[i]['possible_loss'] = 0
-
-
-        
-        # Check for sequence numbers
-        has_seq_nums = all(pkt.get('seq_num') is not None for pkt in packets)
-        if has_seq_nums:
-            for i in range(1, len(packets)):
-                if (packets[i].get('seq_num') is not None and 
-                    packets[i-1].get('seq_num') is not None):
-                    expected_seq = packets[i-1]['seq_num'] + 1
-                    if packets[i]['seq_num'] > expected_seq:
-                        packets[i]['seq_loss'] = packets[i]['seq_num'] - expected_seq
-        
-        for i in range(len(packets)):
-            if 'jitter' in packets[i] and 'possible_loss' in packets[i]:
-                jitter_ratio = packets[i]['jitter'] / mean_ipd if mean_ipd > 0 else 0
-                packets[i]['congestion_score'] = jitter_ratio * 0.5 + (packets[i]['possible_loss'] / 5) * 0.5
-        
-        for i in range(len(packets)):
-            packets[i]['mean_ipd'] = mean_ipd
-            packets[i]['std_ipd'] = std_ipd
-            packets[i]['total_packets'] = len(packets)
-        
-        udp_data.extend(packets)
+    df_udp, conn_idx = stack_connections(udp_connections)
+    
+    # Per-connection statistics are grouped on the connection index and
+    # broadcast back to every packet
+    n = len(df_udp)
+    same_conn = conn_idx[1:] == conn_idx[:-1]
+    ts = df_udp['timestamp'].to_numpy(dtype=float)
+    
+    ipd = np.full(n, np.nan)
+    ipd[1:] = np.where(same_conn, np.diff(ts), np.nan)
+    ipd_by_conn = pd.Series(ipd).groupby(conn_idx)
+    # Single-packet connections have no IPDs and report 0
+    mean_ipd = ipd_by_conn.mean().fillna(0).to_numpy()[conn_idx]
+    std_ipd = ipd_by_conn.std(ddof=0).fillna(0).to_numpy()[conn_idx]
+    
+    # Change between consecutive IPDs, defined from the third packet of a connection
+    delta = np.full(n, np.nan)
+    delta[1:] = np.abs(np.diff(ipd))
+    has_delta = ~np.isnan(delta)
     
-    return pd.DataFrame(udp_data)
+    # RFC 3550 jitter: J = J + (|D(i-1,i)| - J)/16, seeded with the first delta,
+    # which is an exponential moving average with alpha 1/16
+    jitter = pd.Series(delta).groupby(conn_idx).ewm(alpha=1/16, adjust=False).mean().to_numpy()
+    
+    # Keep the original packet loss detection logic: IPDs beyond mean + 3 std
+    with np.errstate(divide='ignore', invalid='ignore'):
+        gaps = np.where(mean_ipd > 0, np.ceil(ipd / mean_ipd) - 1, 0)
+        jitter_ratio = np.where(mean_ipd > 0, jitter / mean_ipd, 0)
+    possible_loss = np.where(ipd > mean_ipd + 3 * std_ipd, gaps, 0)
+    possible_loss = np.where(has_delta, possible_loss, np.nan)
+    congestion_score = np.where(has_delta, jitter_ratio * 0.5 + (possible_loss / 5) * 0.5, np.nan)
+    
+    # Sequence gaps, only for connections where every packet carries a sequence number
+    seq_loss = np.full(n, np.nan)
+    if 'seq_num' in df_udp.columns:
+        seq = df_udp['seq_num'].to_numpy(dtype=float)
+        fully_numbered = pd.Series(~np.isnan(seq)).groupby(conn_idx).all().to_numpy()[conn_idx]
+        missing = seq[1:] - seq[:-1] - 1
+        seq_loss[1:] = np.where(same_conn & fully_numbered[1:] & (missing > 0), missing, np.nan)
+    
+    # Metrics that never apply are left out, the tabs check for the column
+    for col, values in (('ipd', ipd), ('jitter', jitter), ('possible_loss', possible_loss),
+                        ('seq_loss', seq_loss), ('congestion_score', congestion_score)):
+        if not np.isnan(values).all():
+            df_udp[col] = values
+    
+    df_udp['mean_ipd'] = mean_ipd
+    df_udp['std_ipd'] = std_ipd
+    df_udp['total_packets'] = np.bincount(conn_idx)[conn_idx]
+    return df_udp
 
-def calculate_mqtt_metrics(mqtt_connections, mqtt_messages):
-    """Calculate MQTT-specific metrics and merge with delay information"""
+def calculate_mqtt_metrics(mqtt_connections, delay_metrics):
+    """Calculate MQTT-specific metrics and merge with the delays from extract_mqtt_delays"""
     if not mqtt_connections:
         return pd.DataFrame()
     
-    mqtt_data = []
-    for conn_id, packets in mqtt_connections.items():
-        packets.sort(key=lambda x: x['timestamp'])
-        mqtt_data.extend(packets)
-    
-    df_mqtt = pd.DataFrame(mqtt_data)
-    delay_metrics = extract_mqtt_delays(mqtt_messages)
+    df_mqtt, _ = stack_connections(mqtt_connections)
     
     if not delay_metrics.empty and not df_mqtt.empty and 'msg_id' in df_mqtt.columns:
-        # Ensure msg_id is string type in both DataFrames before merging
+        # extract_mqtt_delays already keys delays by string msg_id
         df_mqtt['msg_id'] = df_mqtt['msg_id'].astype(str)
-        delay_metrics['msg_id'] = delay_metrics['msg_id'].astype(str)
         df_mqtt = pd.merge(df_mqtt, delay_metrics, on='msg_id', how='left')
     
     return df_mqtt
\ No newline at end of file
@@ -1,6 +1,10 @@
-import statistics
+import pandas as pd
 from typing import List, Dict, Any
 
+# Record fields that delays are correlated against
+FACTORS = ["packet_size", "protocol", "source_ip", "destination_ip"]
+LABEL_FACTORS = ["protocol", "source_ip", "destination_ip"]
+
 class RootCauseAnalysis:
     """
     This class provides functionality to correlate delays with factors
@@ -11,8 +15,9 @@ class RootCauseAnalysis:
         """
         Initializes the RootCauseAnalysis object.
         Can be extended for additional data or config if needed.
+        Records are stored column-wise, one list per field.
         """
-        self.records = []
+        self.columns = {name: [] for name in ["delay"] + FACTORS}
 
     def add_record(self, delay: float, packet_size: int, protocol: str,
                    source_ip: str, destination_ip: str) -> None:
@@ -25,13 +30,24 @@ class RootCauseAnalysis:
         :param source_ip: Source IP address
         :param destination_ip: Destination IP address
         """
-        self.records.append({
-            "delay": delay,
-            "packet_size": packet_size,
-            "protocol": protocol,
-            "source_ip": source_ip,
-            "destination_ip": destination_ip
-        })
+        self.add_records([delay], [packet_size], [protocol], [source_ip], [destination_ip])
+
+    def add_records(self, delays: List[float], packet_sizes: List[int], protocols: List[str],
+                    source_ips: List[str], destination_ips: List[str]) -> None:
+        """
+        Store many records at once, given as equal-length sequences per field.
+
+        :param delays: Delay measurements
+        :param packet_sizes: Packet sizes (bytes)
+        :param protocols: Protocol names
+        :param source_ips: Source IP addresses
+        :param destination_ips: Destination IP addresses
+        """
+        self.columns["delay"].extend(delays)
+        self.columns["packet_size"].extend(packet_sizes)
+        self.columns["protocol"].extend(protocols)
+        self.columns["source_ip"].extend(source_ips)
+        self.columns["destination_ip"].extend(destination_ips)
 
     def compute_statistics(self) -> Dict[str, float]:
         """
@@ -39,15 +55,15 @@ class RootCauseAnalysis:
 
         :return: Dictionary with min, max, average, and median.
         """
-        if not self.records:
+        if not self.columns["delay"]:
             return {"min_delay": 0.0, "max_delay": 0.0, "avg_delay": 0.0, "median_delay": 0.0}
 
-        delays = [r["delay"] for r in self.records]
+        stats = pd.Series(self.columns["delay"], dtype=float).agg(["min", "max", "mean", "median"])
         return {
-            "min_delay": min(delays),
-            "max_delay": max(delays),
-            "avg_delay": sum(delays) / len(delays),
-            "median_delay": statistics.median(delays)
+            "min_delay": stats["min"],
+            "max_delay": stats["max"],
+            "avg_delay": stats["mean"],
+            "median_delay": stats["median"]
         }
 
     def correlate_factors(self) -> Dict[str, Dict[Any, float]]:
@@ -56,26 +72,22 @@ class RootCauseAnalysis:
 
         :return: Nested dictionary with average delay for each factor grouping.
         """
-        factor_buckets = {
-            "packet_size": {},
-            "protocol": {},
-            "source_ip": {},
-            "destination_ip": {}
-        }
+        df = pd.DataFrame(self.columns)
+        df["delay"] = df["delay"].astype(float)
 
-        for record in self.records:
-            for factor in factor_buckets:
-                key = record[factor]
-                if key not in factor_buckets[factor]:
-                    factor_buckets[factor][key] = []
-                factor_buckets[factor][key].append(record["delay"])
-
-        # Compute average delays per factor
-        for factor, value_map in factor_buckets.items():
-            for key, values in value_map.items():
-                factor_buckets[factor][key] = sum(values) / len(values)
+        # Groups keep first-seen order and include missing keys, like the report expects
+        correlation = {
+            factor: df.groupby(factor, sort=False, dropna=False)["delay"].mean().to_dict()
+            for factor in FACTORS
+        }
 
-        return factor_buckets
+        # Missing labels are reported as None, not as the NaN group key pandas uses
+        for factor in LABEL_FACTORS:
+            correlation[factor] = {
+                (None if pd.isna(key) else key): avg_delay
+                for key, avg_delay in correlation[factor].items()
+            }
+        return correlation
 
     def generate_report(self) -> str:
         """
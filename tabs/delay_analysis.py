@@ -75,7 +75,7 @@ def show_delay_analysis_tab(df_delays):
             
             if "device_to_broker_delay_category" in df_delays.columns:
                 # Show categories
-                category_counts = df_delays["device_to_broker_delay_category"].value_counts().reset_index()
+                category_counts = df_delays["device_to_broker_delay_category"].value_counts(sort=False).reset_index()
                 category_counts.columns = ["Category", "Count"]
                 
                 fig = px.pie(
@@ -105,7 +105,7 @@ def show_delay_analysis_tab(df_delays):
             
             if "broker_processing_delay_category" in df_delays.columns:
                 # Show categories
-                category_counts = df_delays["broker_processing_delay_category"].value_counts().reset_index()
+                category_counts = df_delays["broker_processing_delay_category"].value_counts(sort=False).reset_index()
                 category_counts.columns = ["Category", "Count"]
                 
                 fig = px.pie(
@@ -135,7 +135,7 @@ def show_delay_analysis_tab(df_delays):
             
             if "cloud_upload_delay_category" in df_delays.columns:
                 # Show categories
-                category_counts = df_delays["cloud_upload_delay_category"].value_counts().reset_index()
+                category_counts = df_delays["cloud_upload_delay_category"].value_counts(sort=False).reset_index()
                 category_counts.columns = ["Category", "Count"]
                 
                 fig = px.pie(
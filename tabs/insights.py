@@ -1,5 +1,6 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 
 def categorize_delays(df: pd.DataFrame) -> pd.DataFrame:
@@ -33,11 +34,11 @@ def detect_anomalies_in_delays(df: pd.DataFrame) -> pd.DataFrame:
     """
     Flag anomalies in each delay column if it exceeds mean + 3 * std.
     """
-    df["is_anomaly"] = False
-    for col in ["device_to_broker_delay", "broker_processing_delay", "cloud_upload_delay"]:
-        if col in df.columns:
-            threshold = df[col].mean() + 3 * df[col].std()
-            df.loc[df[col] > threshold, "is_anomaly"] = True
+    cols = [col for col in ["device_to_broker_delay", "broker_processing_delay", "cloud_upload_delay"]
+            if col in df.columns]
+    # Compare all columns against their cutoffs at once and OR across each row
+    cutoffs = (df[cols].mean() + 3 * df[cols].std()).to_numpy()
+    df["is_anomaly"] = np.logical_or.reduce(df[cols].to_numpy(dtype=float) > cutoffs, axis=1)
     return df
 
 def show_insights_tab(df_delays: pd.DataFrame):
@@ -6,19 +6,15 @@ import numpy as np
 import datetime
 
 from visualizations import hist_with_boundaries, mqtt_delay_components
-from analysis import analyze_mqtt_delays
 
-def show_mqtt_analysis_tab(df_mqtt):
-    """Display MQTT-specific analysis and visualizations"""
+def show_mqtt_analysis_tab(df_mqtt, stats):
+    """Display MQTT-specific analysis and visualizations (df_mqtt is already analyzed)"""
     st.header("MQTT Delay Analysis")
     
     if df_mqtt.empty:
         st.warning("No MQTT data available in the uploaded PCAP file.")
         return
     
-    # Process data for analysis
-    df_mqtt, stats = analyze_mqtt_delays(df_mqtt)
-    
     # Overview metrics
     st.subheader("MQTT Performance Overview")
     
@@ -105,7 +101,7 @@ def show_mqtt_analysis_tab(df_mqtt):
                 
                 # Show delay categories
                 if "device_to_broker_delay_category" in df_mqtt.columns:
-                    category_counts = df_mqtt["device_to_broker_delay_category"].value_counts().reset_index()
+                    category_counts = df_mqtt["device_to_broker_delay_category"].value_counts(sort=False).reset_index()
                     category_counts.columns = ["Category", "Count"]
                     
                     fig = px.bar(
@@ -150,7 +146,7 @@ def show_mqtt_analysis_tab(df_mqtt):
                 
                 # Show delay by message type
                 if "msg_type_name" in df_mqtt.columns:
-                    bp_by_type = bp_data.groupby("msg_type_name")["broker_processing_delay"].mean().reset_index()
+                    bp_by_type = bp_data.groupby("msg_type_name", observed=True)["broker_processing_delay"].mean().reset_index()
                     
                     fig = px.bar(
                         bp_by_type.sort_values("broker_processing_delay", ascending=False),
@@ -188,7 +184,7 @@ def show_mqtt_analysis_tab(df_mqtt):
                 
     #             # Show cloud delay categories
     #             if "cloud_upload_delay_category" in df_mqtt.columns:
-    #                 category_counts = df_mqtt["cloud_upload_delay_category"].value_counts().reset_index()
+    #                 category_counts = df_mqtt["cloud_upload_delay_category"].value_counts(sort=False).reset_index()
     #                 category_counts.columns = ["Category", "Count"]
                     
     #                 fig = px.pie(
@@ -13,7 +13,7 @@ def show_overview_tab(df_packets, df_delays, df_retrans):
     earliest_ts = df_packets["timestamp"].min() if total_packets > 0 else 0
     latest_ts = df_packets["timestamp"].max() if total_packets > 0 else 0
     packet_loss_pct = compute_packet_loss(df_packets, df_retrans)
-    anomaly_count = len(df_delays[df_delays["is_anomaly"] == True]) if "is_anomaly" in df_delays.columns else 0
+    anomaly_count = int(df_delays["is_anomaly"].to_numpy().sum()) if "is_anomaly" in df_delays.columns else 0
     avg_total_delay = df_delays["total_delay"].mean() if "total_delay" in df_delays.columns else 0
 
     # Display key metrics
@@ -1,5 +1,22 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+
+# Rows sent to the browser per page of filtered packets
+PAGE_SIZE = 1000
+
+
+def contains_mask(series, text, case=True):
+    """
+    Boolean mask of rows whose value contains `text` (plain substring, no regex).
+    Categorical columns test each distinct value once and expand the result
+    through the integer codes; missing values never match.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        hits = series.cat.categories.astype(str).str.contains(text, case=case, regex=False)
+        # Code -1 (missing) picks the trailing False
+        return np.append(np.asarray(hits, dtype=bool), False)[series.cat.codes.to_numpy()]
+    return series.str.contains(text, case=case, regex=False, na=False).to_numpy(dtype=bool)
 
 
 def show_search_tab(df_packets, df_delays):
@@ -19,23 +36,33 @@ def show_search_tab(df_packets, df_delays):
 
     # Apply filters to packets
     if not df_packets.empty:
-        filtered_df = df_packets.copy()
+        # Every filter narrows one mask over the full table; rows are selected once at the end
+        mask = np.ones(len(df_packets), dtype=bool)
         if filter_proto.strip():
-            filtered_df = filtered_df[filtered_df["protocol"].str.contains(filter_proto.strip(), case=False, na=False)]
+            mask &= contains_mask(df_packets["protocol"], filter_proto.strip(), case=False)
         if filter_ip.strip():
             # match if src_ip or dst_ip has that substring
-            mask_ip = filtered_df["src_ip"].str.contains(filter_ip.strip(), na=False) | \
-                    filtered_df["dst_ip"].str.contains(filter_ip.strip(), na=False)
-            filtered_df = filtered_df[mask_ip]
+            mask &= contains_mask(df_packets["src_ip"], filter_ip.strip()) | \
+                    contains_mask(df_packets["dst_ip"], filter_ip.strip())
         if filter_port.strip():
-            # match if src_port or dst_port
-            mask_port = filtered_df["src_port"].astype(str).str.contains(filter_port.strip()) | \
-                        filtered_df["dst_port"].astype(str).str.contains(filter_port.strip())
-            filtered_df = filtered_df[mask_port]
+            # match if src_port or dst_port equals the port, compared as integers
+            try:
+                port = int(filter_port.strip())
+            except ValueError:
+                st.warning("Port filter must be a number.")
+            else:
+                mask &= (df_packets["src_port"] == port).to_numpy(dtype=bool, na_value=False) | \
+                        (df_packets["dst_port"] == port).to_numpy(dtype=bool, na_value=False)
+        filtered_df = df_packets[mask]
 
         # Display filtered results
         st.write(f"Filtered Packet Count: {len(filtered_df)}")
-        st.dataframe(filtered_df)
+        # Only the current page is serialized for the browser
+        page_count = max(1, -(-len(filtered_df) // PAGE_SIZE))
+        page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+        start = (page - 1) * PAGE_SIZE
+        st.caption(f"Page {page} of {page_count}")
+        st.dataframe(filtered_df.iloc[start:start + PAGE_SIZE])
     else:
         st.info("No packet data available to filter.")
     
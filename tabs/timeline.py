@@ -12,15 +12,9 @@ def show_timeline_tab(df_delays, df_retrans):
 
     # Enhanced time-series visualization
     if not df_delays.empty:
-        # Make a clean copy of the dataframe for processing
-        df_delays_plot = df_delays.copy()
-        
-        # Convert timestamp and handle missing columns
-        if 'device_publish_time' in df_delays_plot.columns:
-            df_delays_plot["timestamp"] = pd.to_datetime(
-                df_delays_plot["device_publish_time"], 
-                unit='ms'
-            )
+        # Shallow copy: plot-only columns are added without duplicating the data.
+        # The datetime "timestamp" column is prepared when the data is loaded.
+        df_delays_plot = df_delays.copy(deep=False)
         
         # Anomaly detection - calculate fresh threshold each time
         if 'total_delay' in df_delays_plot.columns:
@@ -64,10 +58,9 @@ def show_timeline_tab(df_delays, df_retrans):
             # If bottleneck column exists, create a combined column for coloring
             if 'bottleneck' in df_delays_plot.columns:
                 # Create a new column that combines bottleneck and anomaly information
-                df_delays_plot["display_category"] = df_delays_plot.apply(
-                    lambda row: f"{row['bottleneck']} (Anomaly)" if row['is_anomaly'] 
-                               else row['bottleneck'], 
-                    axis=1
+                bottleneck = df_delays_plot['bottleneck'].astype(str)
+                df_delays_plot["display_category"] = bottleneck.where(
+                    ~df_delays_plot['is_anomaly'].astype(bool), bottleneck + " (Anomaly)"
                 )
                 
                 # Update color mapping to show both bottleneck and anomaly status
@@ -140,14 +133,9 @@ def show_timeline_tab(df_delays, df_retrans):
 
     # Retransmission visualization with column fix
     if not df_retrans.empty:
-        df_retrans_plot = df_retrans.copy()
+        df_retrans_plot = df_retrans
         
-        if 'timestamp' in df_retrans_plot.columns:  # Updated column name
-            df_retrans_plot["timestamp"] = pd.to_datetime(
-                df_retrans_plot["timestamp"], 
-                unit='ms'
-            )
-            
+        if 'timestamp' in df_retrans_plot.columns:  # Datetime column prepared at load time
             fig_ret = px.scatter(
                 df_retrans_plot, 
                 x="timestamp", 
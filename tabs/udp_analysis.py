@@ -5,19 +5,15 @@ import pandas as pd
 import numpy as np
 
 from visualizations import hist_with_boundaries, udp_jitter_plot, congestion_heatmap
-from analysis import analyze_udp_delays
 
-def show_udp_analysis_tab(df_udp):
-    """Display UDP-specific analysis and visualizations"""
+def show_udp_analysis_tab(df_udp, conn_stats):
+    """Display UDP-specific analysis and visualizations (df_udp is already analyzed)"""
     st.header("UDP Delay Analysis")
     
     if df_udp.empty:
         st.warning("No UDP data available in the uploaded PCAP file.")
         return
     
-    # Process data for analysis
-    df_udp, conn_stats = analyze_udp_delays(df_udp)
-    
     # Overview metrics
     st.subheader("UDP Performance Overview")
     
@@ -52,7 +48,7 @@ def show_udp_analysis_tab(df_udp):
         
         # Total connections
         if "conn_id" in df_udp.columns:
-            st.metric("Total UDP Connections", f"{len(df_udp['conn_id'].unique())}")
+            st.metric("Total UDP Connections", f"{df_udp['conn_id'].nunique()}")
     
     # Create tabs for different analyses
     udp_tabs = st.tabs([
@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the repository root rather than in an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pcap_parser
+
+
+@pytest.fixture
+def tshark_rows(monkeypatch):
+    """
+    Feed parse_pcap canned packets instead of running tshark.
+    Each packet is a dict keyed by TSHARK_FIELDS names; absent fields are empty.
+    """
+    def feed(packets):
+        rows = [[str(packet.get(field, '')) for field in pcap_parser.TSHARK_FIELDS]
+                for packet in packets]
+        monkeypatch.setattr(pcap_parser, 'read_tshark_fields', lambda *args, **kwargs: iter(rows))
+    return feed
@@ -0,0 +1,22 @@
+from analysis import analyze_mqtt_delays, compute_delay_stats
+from pcap_parser import parse_pcap
+
+
+def test_mqtt_capture_without_complete_exchange(tshark_rows):
+    # A single PUBLISH that is never acknowledged yields no delay columns
+    tshark_rows([{
+        'frame.time_epoch': 1600000000.1, 'frame.len': 100,
+        'ip.src': '10.0.0.1', 'ip.dst': '10.0.0.2',
+        'tcp.srcport': 54321, 'tcp.dstport': 1883,
+        'mqtt.msgtype': 3, 'mqtt.msgid': 7,
+    }])
+    _, df_delays, _, _, _, df_mqtt = parse_pcap('unanswered.pcap')
+    assert df_delays.empty
+    assert len(df_mqtt) == 1
+
+    assert compute_delay_stats(df_mqtt).empty
+    df_mqtt, stats = analyze_mqtt_delays(df_mqtt)
+    assert stats['total_clients'] == 1
+    assert stats['msg_type_stats'] == {'PUBLISH': 1}
+    assert 'total_delay_mean' not in stats
+    assert 'bottleneck' not in df_mqtt.columns
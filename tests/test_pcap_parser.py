@@ -0,0 +1,129 @@
+import pytest
+
+import pcap_parser
+from pcap_parser import parse_pcap
+
+
+def fake_tshark(tmp_path, monkeypatch, script):
+    fake = tmp_path / 'tshark'
+    fake.write_text('#!/bin/sh\n' + script)
+    fake.chmod(0o755)
+    monkeypatch.setattr(pcap_parser.shutil, 'which', lambda name: str(fake))
+
+
+def test_tshark_failure_raises(tmp_path, monkeypatch):
+    fake_tshark(tmp_path, monkeypatch,
+                'echo "The file appears to be damaged or corrupt." >&2\nexit 2\n')
+
+    with pytest.raises(RuntimeError, match='damaged or corrupt'):
+        parse_pcap(str(tmp_path / 'broken.pcap'))
+
+
+def test_truncated_capture_keeps_packets(tmp_path, monkeypatch):
+    # Two UDP packets are printed before tshark reports the cut-off capture
+    rows = []
+    for timestamp in ('1600000000.1', '1600000000.2'):
+        fields = dict.fromkeys(pcap_parser.TSHARK_FIELDS, '')
+        fields.update({'frame.time_epoch': timestamp, 'frame.len': '120',
+                       'ip.src': '10.0.0.1', 'ip.dst': '10.0.0.4',
+                       'udp.srcport': '5000', 'udp.dstport': '6000'})
+        rows.append('\t'.join(fields[field] for field in pcap_parser.TSHARK_FIELDS))
+    fake_tshark(tmp_path, monkeypatch,
+                ''.join(f"printf '%s\\n' '{row}'\n" for row in rows)
+                + 'echo "The file appears to have been cut short in the middle of a packet." >&2\n'
+                + 'exit 2\n')
+
+    with pytest.warns(pcap_parser.TruncatedCaptureWarning, match='cut short'):
+        df_packets, _, _, _, df_udp, _ = parse_pcap(str(tmp_path / 'truncated.pcap'))
+    assert len(df_packets) == 2
+    assert len(df_udp) == 2
+
+
+def tcp_packet(conn_id, timestamp, seq_num=0, ack_num=0, syn=0, ack=0, payload_size=0, is_retrans=False):
+    return {'timestamp': timestamp, 'conn_id': conn_id, 'seq_num': seq_num, 'ack_num': ack_num,
+            'flags_syn': syn, 'flags_ack': ack, 'flags_rst': 0, 'flags_fin': 0,
+            'payload_size': payload_size, 'is_retrans': is_retrans}
+
+
+def udp_packet(conn_id, timestamp, seq_num=None):
+    packet = {'timestamp': timestamp, 'conn_id': conn_id, 'payload_size': 100}
+    if seq_num is not None:
+        packet['seq_num'] = seq_num
+    return packet
+
+
+def by_conn(packets):
+    connections = {}
+    for packet in packets:
+        connections.setdefault(packet['conn_id'], []).append(packet)
+    return connections
+
+
+def test_tcp_metrics():
+    nan = float('nan')
+    df = pcap_parser.calculate_tcp_metrics(by_conn([
+        # Handshake, one data segment and its ACK, then a retransmission of that segment
+        tcp_packet('a', 0.0, syn=1),
+        tcp_packet('a', 0.05, syn=1, ack=1),
+        tcp_packet('a', 0.1, seq_num=1, payload_size=100),
+        tcp_packet('a', 0.13, seq_num=500, ack_num=101, ack=1),
+        tcp_packet('a', 0.3, seq_num=1, payload_size=100, is_retrans=True),
+        # SYN never answered on its own connection; the next connection's SYN-ACK must not pair with it
+        tcp_packet('b', 1.0, syn=1),
+        tcp_packet('b', 1.2, seq_num=1, payload_size=10),
+        tcp_packet('c', 2.0, syn=1, ack=1),
+        # Single-packet connection
+        tcp_packet('d', 3.0, seq_num=7, payload_size=10),
+    ]))
+
+    approx = lambda values: pytest.approx(values, nan_ok=True)
+    assert df['ipd'].tolist() == approx([nan, 0.05, 0.05, 0.03, 0.17, nan, 0.2, nan, nan])
+    assert df['rtt'].tolist() == approx([0.05, nan, nan, nan, nan, nan, nan, nan, nan])
+    assert df['ack_delay'].tolist() == approx([nan, nan, 0.03, nan, nan, nan, nan, nan, nan])
+    assert df['jitter'].tolist() == approx([nan, nan, 0.0, 0.02, 0.14, nan, nan, nan, nan])
+    assert df['retrans_delay'].tolist() == approx([nan, nan, nan, nan, 0.2, nan, nan, nan, nan])
+    assert df['packet_loss_pct'].iloc[0] == pytest.approx(100 / 9)
+
+
+def test_udp_metrics():
+    nan = float('nan')
+    # 20 packets 0.1s apart followed by a 1s gap, and a single-packet connection
+    steady = [udp_packet('a', i * 0.1) for i in range(20)] + [udp_packet('a', 2.9)]
+    df = pcap_parser.calculate_udp_metrics(by_conn(steady + [udp_packet('b', 5.0)]))
+
+    approx = lambda values: pytest.approx(values, nan_ok=True)
+    a, b = df[df['conn_id'] == 'a'], df[df['conn_id'] == 'b']
+    assert a['mean_ipd'].iloc[0] == pytest.approx(0.145)
+    assert a['total_packets'].iloc[0] == 21
+    # Jitter starts at the third packet and only moves once the gap arrives
+    assert a['jitter'].tolist()[:3] == approx([nan, nan, 0.0])
+    assert a['jitter'].iloc[-1] == pytest.approx(0.9 / 16)
+    # The gap exceeds mean + 3 std and spans ceil(1.0 / 0.145) - 1 missing packets
+    assert a['possible_loss'].tolist()[-3:] == [0, 0, 6]
+
+    assert b['ipd'].tolist() == approx([nan])
+    assert b['jitter'].tolist() == approx([nan])
+    assert b['mean_ipd'].tolist() == [0]
+    assert b['total_packets'].tolist() == [1]
+
+
+def test_udp_sequence_gaps():
+    nan = float('nan')
+    df = pcap_parser.calculate_udp_metrics(by_conn(
+        [udp_packet('a', t, seq) for t, seq in [(0.0, 1), (0.1, 2), (0.2, 4), (0.3, 5)]]
+        + [udp_packet('b', 1.0), udp_packet('b', 1.1, 9)]
+    ))
+    # Connection b is not fully numbered, so no gaps are reported for it
+    assert df['seq_loss'].tolist() == pytest.approx([nan, nan, 1, nan, nan, nan], nan_ok=True)
+
+
+def test_is_external_ip():
+    assert not pcap_parser.is_external_ip('10.1.2.3')
+    assert not pcap_parser.is_external_ip('172.31.255.1')
+    assert not pcap_parser.is_external_ip('192.168.0.10')
+    assert pcap_parser.is_external_ip('172.32.0.1')
+    assert pcap_parser.is_external_ip('8.8.8.8')
+    # Missing, IPv6 and malformed addresses are never external
+    assert not pcap_parser.is_external_ip(None)
+    assert not pcap_parser.is_external_ip('2001:db8::1')
+    assert not pcap_parser.is_external_ip('10.0.0.256')
@@ -0,0 +1,14 @@
+import numpy as np
+
+from rootcause_analysis import RootCauseAnalysis
+
+
+def test_missing_labels_reported_as_none():
+    rca = RootCauseAnalysis()
+    rca.add_records([1.0, 2.0, 4.0], [10, 10, 20], ['TCP', None, np.nan],
+                    ['10.0.0.1', None, '10.0.0.1'], ['10.0.0.2', '10.0.0.2', '10.0.0.2'])
+
+    correlation = rca.correlate_factors()
+    assert correlation['protocol'] == {'TCP': 1.0, None: 3.0}
+    assert correlation['source_ip'] == {'10.0.0.1': 2.5, None: 2.0}
+    assert "Protocol: None -> Avg Delay: 3.0000 ms" in rca.generate_report()
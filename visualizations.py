@@ -7,16 +7,23 @@ def hist_with_boundaries(df, xcol, title, color="royalblue"):
     """
     Create a histogram with better visual boundaries and statistical annotations.
     """
-    if xcol not in df.columns or df[xcol].empty:
+    # Pull the column out once; every statistic below skips NaN like pandas does
+    values = df[xcol].to_numpy(dtype=float) if xcol in df.columns else np.empty(0)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
         fig = go.Figure()
         fig.update_layout(title=f"No data available for {xcol}")
         return fig
     
+    # Calculate statistics
+    q25, median_val, q75 = np.percentile(values, [25, 50, 75])
+    mean_val = values.mean()
+    std_val = values.std(ddof=1) if values.size > 1 else np.nan
+    
     # Calculate optimal bin count using Freedman-Diaconis rule
-    q75, q25 = np.percentile(df[xcol], [75, 25])
     iqr = q75 - q25
-    bin_width = 2 * iqr / (len(df) ** (1/3)) if iqr > 0 else 0.01
-    bin_count = int(np.ceil((df[xcol].max() - df[xcol].min()) / bin_width))
+    bin_width = 2 * iqr / (values.size ** (1/3)) if iqr > 0 else 0.01
+    bin_count = int(np.ceil((values.max() - values.min()) / bin_width))
     bin_count = max(10, min(30, bin_count))  # Keep between 10-30 bins
     
     fig = px.histogram(
@@ -36,11 +43,6 @@ def hist_with_boundaries(df, xcol, title, color="royalblue"):
         opacity=0.8
     )
     
-    # Calculate statistics
-    mean_val = df[xcol].mean()
-    std_val = df[xcol].std()
-    median_val = df[xcol].median()
-    
     # Add more visible annotations
     fig.add_vline(
         x=mean_val,
@@ -196,7 +198,7 @@ def connection_rtt_chart(df_tcp):
         return fig
     
     # Group by connection and calculate mean RTT
-    rtt_by_conn = df_tcp.groupby('conn_id')['rtt'].mean().reset_index()
+    rtt_by_conn = df_tcp.groupby('conn_id', observed=True)['rtt'].mean().reset_index()
     
     # Sort by RTT and take top 10
     top_conns = rtt_by_conn.sort_values('rtt', ascending=False).head(10)